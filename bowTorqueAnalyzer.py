@@ -1,83 +1,690 @@
 # === IMPORTS ==================================================================
+import argparse
+import collections
+import concurrent.futures
+import csv
+import datetime
 import enum
+import fractions
+import functools
 import glob
+import heapq
 import math
+import multiprocessing
 import operator
 import os
+import pickle
 import shot
+import shotCache
+import shotIndex
 import shotOutput
+import shotPipeline
 import shotPlot
+import shotReport
+import shotTrace
 import shutil
 import string
+import sys
+import threading
+import time
 import typing
 import xlsxwriter
 
 # === GLOBAL CONSTANTS =========================================================
 
 DATA_FOLDER = '_DATA'
+EXPORT_FOLDER = '_EXPORT'
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_INPUT = '*.csv'
+# Captures a directory argument expands to: CSV and converted binary ones.
+FOLDER_INPUTS = (DEFAULT_INPUT, '*' + shot.CAPTURE_EXTENSION)
+ALL_DATA_NAME = 'all'
+SHARD_EXTENSION = '.shard'
+DEFAULT_WATCH_INTERVAL = 1.0
+
+# === ENUM =====================================================================
+
+class Writer(enum.Enum):
+    Summary = 'summary'
+    Gyro = 'gyro'
+    Accel = 'accel'
+    HiG = 'hig'
+    AllData = 'all-data'
+# Shorthand accepted by --skip for all three per-stream _DATA workbooks.
+DATA_WRITERS = (Writer.Gyro, Writer.Accel, Writer.HiG)
 
 # === FUNCTIONS ================================================================
 
-def __initRawDataLog() -> typing.List[shotOutput.xlsxData]:
+def __initRawDataLog(path : str, skip : typing.Set[Writer] = set(), decimation : int = 1) -> typing.List[shotOutput.xlsxData]:
     GYRO_NAME = 'gyro'
     ACCEL_NAME = 'accel'
     HIG_NAME = 'hiG'
-    path : str = os.path.join(os.getcwd(), DATA_FOLDER)
-    try:
-        os.makedirs(path)
-    except:
-        pass
     NAME_LUT = {
         shotOutput.xlsxData.DataType.Gyro : GYRO_NAME,
         shotOutput.xlsxData.DataType.Accel : ACCEL_NAME,
         shotOutput.xlsxData.DataType.HiG : HIG_NAME
         }
+    WRITER_LUT = {
+        shotOutput.xlsxData.DataType.Gyro : Writer.Gyro,
+        shotOutput.xlsxData.DataType.Accel : Writer.Accel,
+        shotOutput.xlsxData.DataType.HiG : Writer.HiG
+        }
     logs : typing.List[shotOutput.xlsxData] = []
     for t in shotOutput.xlsxData.DataType:
-        log : shotOutput.xlsxData = shotOutput.xlsxData(NAME_LUT[t], path, t)
-        logs.append(log)
+        if WRITER_LUT[t] not in skip:
+            log : shotOutput.xlsxData = shotOutput.xlsxData(NAME_LUT[t], path, t, decimation)
+            logs.append(log)
     return logs
 
-def __getShotRange(i : int, length : int) -> typing.List[int]:
-    MINUS: int = -5
-    PLUS: int = 5
-    start: int = i + MINUS
-    end: int = i + PLUS
-    if (start < 0):
-        start = 0
-    if (end > length):
-        end = length
-    return [start, end]
-
-def __plot(data : shot.data):
-    range: typing.List[int] = __getShotRange(data.hiGShot.datum.index, len(data.hiG))
-    shotPlot.vector_plot(data.getHiGList(range[0], range[1]))
-    range = __getShotRange(data.shot.datum.index, len(data.accel))
-    shotPlot.vector_plot(data.getAccelList(range[0], range[1]))
-
-def __process():
-    output : shotOutput.xlsx = shotOutput.xlsx(shotOutput.xlsx.Mode.Abbreviated)
-    logs : typing.List[shotOutput.xlsxData] = __initRawDataLog()
-    allLog : shotOutput.xlsxAllData = shotOutput.xlsxAllData('all', DATA_FOLDER)
-    for fileName in glob.glob('*.csv'):
-        print('processing {0}...'.format(fileName))
-        datum : shot.data = shot.data(fileName)
-        confidenceIndex = datum.shot.confidence.value
-        output.writeShotData(datum)
-        for l in logs:
-            l.addData(datum)
-        allLog.addData(datum)
-        #__plot(datum)
+def __plot(data : shot.data, folder : typing.Optional[str] = None):
+    # Whole streams go out as decimated WebGL time series and the samples
+    # around each shot as one batched 3D trace per stream. With a folder the
+    # figures are written as HTML instead of being shown.
+    RADIUS = 5
+    hiG : shot.window = data.getWindowAround(shot.vector.Type.HiG, data.hiGShot.datum.index, RADIUS)
+    accel : shot.window = data.getWindowAround(shot.vector.Type.Accel, data.shot.datum.index, RADIUS)
+    streams = shotPlot.streamFigure([
+        ('accel', data.accel, data.shot.datum.index),
+        ('hiG', data.hiG, data.hiGShot.datum.index),
+        ('gyro', data.gyro, data.shot.datum.index),
+        ])
+    vectors = shotPlot.vectorFigure([('hiG', hiG.values), ('accel', accel.values)])
+    if folder is None:
+        shotPlot.show(streams)
+        shotPlot.show(vectors)
+    else:
+        shotPlot.show(streams, os.path.join(folder, data.name + '.html'))
+        shotPlot.show(vectors, os.path.join(folder, data.name + '-shot.html'))
+
+def __findInputs(patterns : typing.List[str], folderInputs : typing.Tuple[str, ...] = FOLDER_INPUTS, preferBinary : bool = True) -> typing.List[str]:
+    # Sorted so every shard of a run agrees on which file has which position.
+    fileNames : typing.Set[str] = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for folderInput in folderInputs:
+                fileNames.update(glob.glob(os.path.join(pattern, folderInput)))
+        else:
+            fileNames.update(glob.glob(pattern))
+    if preferBinary:
+        # A CSV capture converted next to itself is one capture: analyze the
+        # binary copy only.
+        fileNames = {f for f in fileNames if __getBinaryName(f) == f or __getBinaryName(f) not in fileNames}
+    return sorted(fileNames)
+
+def __getBinaryName(fileName : str) -> str:
+    return os.path.splitext(fileName)[0] + shot.CAPTURE_EXTENSION
+
+def __getSamples(d : shot.data) -> int:
+    return sum(d.getLength(t) for t in (shot.vector.Type.Gyro, shot.vector.Type.Accel, shot.vector.Type.HiG))
+
+def __analyzeFile(fileName : str, tracer : shotTrace.tracer = shotTrace.DISABLED) -> shot.data:
+    # shot.data is lazy, so run the analysis here rather than wherever the
+    # result happens to be used first, e.g. in the parent after a pool worker
+    # has returned it.
+    d : shot.data = shot.data(fileName)
+    with tracer.stage(d.fileName, 'parse') as r:
+        d.gyro
+        d.accel
+        d.hiG
+        d.calibration
+        r.samples = __getSamples(d)
+    with tracer.stage(d.fileName, 'analyze', r.samples):
+        d.maxGyro
+        d.maxAccel
+        d.maxHiG
+    with tracer.stage(d.fileName, 'detect', r.samples):
+        d.shot
+        d.hiGShot
+    return d.evaluate()
+
+def __scanFile(fileName : str, tracer : shotTrace.tracer, chunkRows : int) -> shot.data:
+    with tracer.stage(os.path.basename(fileName), 'scan') as r:
+        d : shot.data = shot.data.scan(fileName, chunkRows)
+        r.samples = __getSamples(d)
+    return d
+
+def __getCached(fileName : str, tracer : shotTrace.tracer, store : shotCache.cache) -> shot.data:
+    with tracer.stage(os.path.basename(fileName), 'cache') as r:
+        d : shot.data = store.get(fileName)
+        r.samples = __getSamples(d)
+    return d
+
+def __analyzeInWorker(analyze : typing.Callable[[str, shotTrace.tracer], shot.data], fileName : str, tracer : shotTrace.tracer,
+                      prepare : typing.Optional[typing.Callable[[shot.data], typing.Any]] = None) -> typing.Tuple[typing.Any, typing.List[shotTrace.record]]:
+    datum : shot.data = analyze(fileName, tracer)
+    if prepare:
+        with tracer.stage(datum.fileName, 'prepare'):
+            return prepare(datum), tracer.records
+    return datum, tracer.records
+
+def __analyzeFiles(fileNames : typing.Iterable[str], workers : int = 1, store : typing.Optional[shotCache.cache] = None, chunkRows : int = 0,
+                   tracer : shotTrace.tracer = shotTrace.DISABLED, prepare : typing.Optional[typing.Callable[[shot.data], typing.Any]] = None) -> typing.Iterator[typing.Any]:
+    # With prepare, prepare(datum) is yielded instead of the datum and runs in
+    # the worker as well, so per-file output work is spread over the pool.
+    analyze : typing.Callable[[str, shotTrace.tracer], shot.data] = __analyzeFile
+    if store:
+        analyze = functools.partial(__getCached, store = store)
+    if chunkRows > 0:
+        analyze = functools.partial(__scanFile, chunkRows = chunkRows)
+    if workers <= 1:
+        for fileName in fileNames:
+            print('processing {0}...'.format(fileName))
+            yield __analyzeInWorker(analyze, fileName, tracer, prepare)[0]
+        return
+    # Keep a bounded window of files in flight and hand results back in input
+    # order, so a slow writer never lets finished captures pile up. Workers
+    # trace into their own tracer and send the records back with the result.
+    pending : typing.Deque[typing.Tuple[str, concurrent.futures.Future]] = collections.deque()
+    # Workers convert to the same units as the parent however they are started.
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers, initializer = shot.setUnitScales, initargs = (dict(shot.UNIT_SCALES),)) as executor:
+        for fileName in fileNames:
+            pending.append((fileName, executor.submit(__analyzeInWorker, analyze, fileName, tracer.fork(), prepare)))
+            if len(pending) > 2 * workers:
+                yield __collect(*pending.popleft(), tracer)
+        while pending:
+            yield __collect(*pending.popleft(), tracer)
+
+def __collect(fileName : str, future : concurrent.futures.Future, tracer : shotTrace.tracer) -> shot.data:
+    print('processing {0}...'.format(fileName))
+    datum, records = future.result()
+    tracer.extend(records)
+    return datum
+
+def __write(data : typing.Iterable[shot.data], outputFolder : str, mode : shotOutput.xlsx.Mode, skip : typing.Set[Writer] = set(), streaming : bool = False, decimation : int = 1,
+            export : typing.Optional[shotOutput.arrowData.Format] = None, session : str = '', tracer : shotTrace.tracer = shotTrace.DISABLED,
+            plotFolder : typing.Optional[str] = None, indexPath : typing.Optional[str] = None, pipe : typing.Optional[shotPipeline.pipeline] = None,
+            finalizeWorkers : int = 1):
+    # With pipe every output runs as a stage of its own thread; otherwise
+    # captures are written one output after the other and the workbooks are
+    # closed by up to finalizeWorkers processes at once.
+    EXPORT_STAGE = 'export'
+    PLOT_STAGE = 'plot'
+    INDEX_STAGE = 'index'
+    if plotFolder:
+        os.makedirs(plotFolder, exist_ok = True)
+    dataFolder : str = os.path.join(outputFolder, DATA_FOLDER)
+    if any(w not in skip for w in DATA_WRITERS + (Writer.AllData,)):
+        os.makedirs(dataFolder, exist_ok = True)
+    output : typing.Optional[shotOutput.xlsx] = None
+    if Writer.Summary not in skip:
+        output = shotOutput.xlsx(mode, os.path.join(outputFolder, shotOutput.DEFAULT_FILE_NAME), streaming = streaming)
+    logs : typing.List[shotOutput.xlsxData] = __initRawDataLog(dataFolder, skip, decimation)
+    allLog : typing.Optional[shotOutput.xlsxAllData] = None
+    if Writer.AllData not in skip:
+        allLog = shotOutput.xlsxAllData(ALL_DATA_NAME, dataFolder)
+    exporter : typing.Optional[shotOutput.arrowData] = None
+    if export:
+        exporter = shotOutput.arrowData(os.path.join(outputFolder, EXPORT_FOLDER), session, export)
+    results : typing.Optional[shotIndex.index] = None
+    if indexPath:
+        results = shotIndex.index(indexPath)
+    # (stage, add, finalize) of every output, in the order captures are
+    # handed to them.
+    writers : typing.List[typing.Tuple[str, typing.Callable[[shot.data], typing.Any], typing.Optional[typing.Callable[[], None]]]] = []
+    if output:
+        writers.append((Writer.Summary.value, output.writeShotData, output.finalize))
     for l in logs:
-        l.finalize()
-    allLog.finalize()
+        writers.append((l.name, l.addData, l.finalize))
+    if allLog:
+        writers.append((Writer.AllData.value, allLog.addData, allLog.finalize))
+    if exporter:
+        writers.append((EXPORT_STAGE, exporter.addData, exporter.finalize))
+    if plotFolder:
+        writers.append((PLOT_STAGE, functools.partial(__plot, folder = plotFolder), None))
+    if results:
+        writers.append((INDEX_STAGE, results.addData, results.finalize))
+    try:
+        if pipe:
+            for name, add, finalize in writers:
+                pipe.addStage(name, add, finalize)
+            # Writers of whole streams would otherwise race to load those of
+            # a scanned capture.
+            load : bool = bool(logs or exporter or plotFolder)
+            pipe.run(data, operator.attrgetter('fileName'), __getSamples, functools.partial(__loadStreams, load = load))
+        else:
+            for datum in data:
+                samples : int = __getSamples(datum)
+                for name, add, finalize in writers:
+                    with tracer.stage(datum.fileName, name, samples):
+                        add(datum)
+            workbooks : typing.Set[str] = {l.name for l in logs}
+            if output:
+                workbooks.add(Writer.Summary.value)
+            if allLog:
+                workbooks.add(Writer.AllData.value)
+            __finalize(writers, workbooks, finalizeWorkers, tracer)
+    finally:
+        if results:
+            results.close()
+
+def __finalize(writers : typing.List[typing.Tuple[str, typing.Callable[[shot.data], typing.Any], typing.Optional[typing.Callable[[], None]]]],
+               workbooks : typing.Set[str], workers : int = 1, tracer : shotTrace.tracer = shotTrace.DISABLED):
+    # Closing a workbook renders and zips all of its XML in Python, so with
+    # workers > 1 they are closed in forked children, which inherit the
+    # writer as it is and need nothing pickled. Forking is only safe while
+    # this is the process's one thread and it holds no Arrow writers or
+    # SQLite connection, so otherwise everything is finalized here in turn.
+    FORK = 'fork'
+    others : bool = any(finalize and name not in workbooks for name, add, finalize in writers)
+    if workers <= 1 or FORK not in multiprocessing.get_all_start_methods() or others or threading.active_count() > 1:
+        workbooks = set()
+    context = multiprocessing.get_context(FORK) if workbooks else None
+    running : typing.Deque[typing.Tuple[str, multiprocessing.Process, float]] = collections.deque()
+    failed : typing.List[str] = []
+
+    def join():
+        name, process, start = running.popleft()
+        process.join()
+        tracer.add('', name + '.finalize', time.perf_counter() - start, 0.0)
+        if process.exitcode != 0:
+            failed.append('{0} (exit code {1})'.format(name, process.exitcode))
+
+    # Anything buffered would be flushed again by every child.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        for name, add, finalize in writers:
+            if finalize and name in workbooks:
+                if len(running) >= workers:
+                    join()
+                process : multiprocessing.Process = context.Process(target = finalize, name = name + '.finalize')
+                process.start()
+                running.append((name, process, time.perf_counter()))
+        for name, add, finalize in writers:
+            if finalize and name not in workbooks:
+                with tracer.stage('', name + '.finalize'):
+                    finalize()
+    finally:
+        while running:
+            join()
+    if failed:
+        raise RuntimeError('finalizing failed: {0}'.format(', '.join(failed)))
+
+def __loadStreams(d : shot.data, load : bool = True):
+    if load:
+        d.gyro
+        d.accel
+        d.hiG
+
+def __report(inputs : typing.List[str], outputFolder : str = '.', workers : int = 1, mode : shotOutput.xlsx.Mode = shotOutput.xlsx.Mode.Abbreviated,
+             store : typing.Optional[shotCache.cache] = None, chunkRows : int = 0, radius : int = shot.WINDOW_RADIUS, tracer : shotTrace.tracer = shotTrace.DISABLED):
+    os.makedirs(outputFolder, exist_ok = True)
+    output : shotReport.dashboard = shotReport.dashboard(mode, os.path.join(outputFolder, shotReport.DEFAULT_FILE_NAME))
+    prepare : typing.Callable[[shot.data], typing.Dict[str, typing.Any]] = functools.partial(shotReport.prepare, mode = mode, radius = radius)
+    for entry in __analyzeFiles(__findInputs(inputs), workers, store, chunkRows, tracer, prepare):
+        output.addEntry(entry)
+    with tracer.stage('', 'report.finalize'):
+        output.finalize()
+    if store:
+        store.evict()
+
+def __getShardPath(outputFolder : str, shardIndex : int, shardCount : int) -> str:
+    return os.path.join(outputFolder, 'shard-{0:04d}-of-{1:04d}{2}'.format(shardIndex, shardCount, SHARD_EXTENSION))
+
+def __writeShard(data : typing.Iterable[typing.Tuple[int, shot.data]], shardPath : str):
+    with open(shardPath, 'wb') as file:
+        for record in data:
+            pickle.dump(record, file, pickle.HIGHEST_PROTOCOL)
+
+def __readShard(shardPath : str) -> typing.Iterator[typing.Tuple[int, shot.data]]:
+    with open(shardPath, 'rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+def __mergeShards(shardPaths : typing.List[str]) -> typing.Iterator[shot.data]:
+    # Each shard is already in input order, so a streaming k-way merge on the
+    # input position restores the order of a single serial run.
+    for position, datum in heapq.merge(*[__readShard(p) for p in shardPaths], key = operator.itemgetter(0)):
+        yield datum
+
+def __process(inputs : typing.List[str] = [DEFAULT_INPUT], outputFolder : str = '.', workers : int = 1,
+              shardIndex : int = 0, shardCount : int = 1,
+              mode : shotOutput.xlsx.Mode = shotOutput.xlsx.Mode.Abbreviated, skip : typing.Set[Writer] = set(),
+              store : typing.Optional[shotCache.cache] = None, streaming : bool = False, decimation : int = 1,
+              export : typing.Optional[shotOutput.arrowData.Format] = None, session : str = '', chunkRows : int = 0,
+              tracer : shotTrace.tracer = shotTrace.DISABLED, plotFolder : typing.Optional[str] = None, indexPath : typing.Optional[str] = None,
+              pipelineDepth : int = 0, readers : int = shotPipeline.DEFAULT_READERS, finalizeWorkers : int = 1):
+    fileNames : typing.List[str] = __findInputs(inputs)
+    os.makedirs(outputFolder, exist_ok = True)
+    pipe : typing.Optional[shotPipeline.pipeline] = None
+    if pipelineDepth > 0:
+        pipe = shotPipeline.pipeline(pipelineDepth, tracer)
+    if shardCount > 1:
+        positions : typing.List[int] = list(range(shardIndex, len(fileNames), shardCount))
+        shardFiles : typing.Iterable[str] = [fileNames[i] for i in positions]
+        if pipe:
+            shardFiles = pipe.readAhead(shardFiles, readers, pipelineDepth)
+        data : typing.Iterator[shot.data] = __analyzeFiles(shardFiles, workers, store, chunkRows, tracer)
+        __writeShard(zip(positions, data), __getShardPath(outputFolder, shardIndex, shardCount))
+    else:
+        inputFiles : typing.Iterable[str] = fileNames
+        if pipe:
+            inputFiles = pipe.readAhead(fileNames, readers, pipelineDepth)
+        __write(__analyzeFiles(inputFiles, workers, store, chunkRows, tracer), outputFolder, mode, skip, streaming, decimation, export, session, tracer, plotFolder, indexPath, pipe, finalizeWorkers)
+    if pipe:
+        pipe.printSummary()
+    if store:
+        store.evict()
+
+def __merge(shardPaths : typing.List[str], outputFolder : str = '.',
+            mode : shotOutput.xlsx.Mode = shotOutput.xlsx.Mode.Abbreviated, skip : typing.Set[Writer] = set(), streaming : bool = False, decimation : int = 1,
+            export : typing.Optional[shotOutput.arrowData.Format] = None, session : str = '', tracer : shotTrace.tracer = shotTrace.DISABLED,
+            plotFolder : typing.Optional[str] = None, indexPath : typing.Optional[str] = None, pipelineDepth : int = 0, finalizeWorkers : int = 1):
+    os.makedirs(outputFolder, exist_ok = True)
+    pipe : typing.Optional[shotPipeline.pipeline] = None
+    if pipelineDepth > 0:
+        pipe = shotPipeline.pipeline(pipelineDepth, tracer)
+    __write(__mergeShards(shardPaths), outputFolder, mode, skip, streaming, decimation, export, session, tracer, plotFolder, indexPath, pipe, finalizeWorkers)
+    if pipe:
+        pipe.printSummary()
+
+def __writeSummary(rows : typing.List[typing.Tuple[typing.List[typing.Any], shot.ShotConfidence]], outputFolder : str, mode : shotOutput.xlsx.Mode):
+    # Rebuilt from the cached summary rows and swapped in atomically, so the
+    # files on disk are always complete and hold one row per capture.
+    fileName : str = os.path.join(outputFolder, shotOutput.DEFAULT_FILE_NAME)
+    output : shotOutput.xlsx = shotOutput.xlsx(mode, fileName + '.tmp')
+    table : shotOutput.csvSummary = shotOutput.csvSummary(mode, fileName + '.tmp')
+    for row, confidence in rows:
+        output.writeShotRow(row, confidence)
+        table.writeShotRow(row)
     output.finalize()
+    table.finalize()
+    os.replace(fileName + '.tmp.xlsx', fileName + '.xlsx')
+    os.replace(fileName + '.tmp.csv', fileName + '.csv')
+
+def __watch(folder : str, outputFolder : str = '.', mode : shotOutput.xlsx.Mode = shotOutput.xlsx.Mode.Abbreviated,
+            interval : float = DEFAULT_WATCH_INTERVAL, store : typing.Optional[shotCache.cache] = None, once : bool = False,
+            indexPath : typing.Optional[str] = None):
+    analyze : typing.Callable[[str], shot.data] = store.get if store else __analyzeFile
+    os.makedirs(outputFolder, exist_ok = True)
+    rows : typing.Dict[str, typing.Tuple[typing.List[typing.Any], shot.ShotConfidence]] = {}
+    processed : typing.Dict[str, typing.Tuple[int, int]] = {}
+    observed : typing.Dict[str, typing.Tuple[int, int]] = {}
+    results : typing.Optional[shotIndex.index] = shotIndex.index(indexPath) if indexPath else None
+    print('watching {0}...'.format(folder))
+    try:
+        while True:
+            changed : bool = False
+            for fileName in __findInputs([folder]):
+                try:
+                    stat : os.stat_result = os.stat(fileName)
+                except FileNotFoundError:
+                    continue
+                signature : typing.Tuple[int, int] = (stat.st_size, stat.st_mtime_ns)
+                if processed.get(fileName) == signature:
+                    continue
+                # Only pick a file up once it has stopped growing between two
+                # polls, so the rig is never caught mid-write.
+                if observed.get(fileName) != signature and not once:
+                    observed[fileName] = signature
+                    continue
+                processed[fileName] = signature
+                print('processing {0}...'.format(fileName))
+                try:
+                    datum : shot.data = analyze(fileName)
+                except (OSError, ValueError) as e:
+                    print('skipping {0}: {1}'.format(fileName, e))
+                    continue
+                rows[fileName] = (shotOutput.xlsx.getShotRow(datum, mode), datum.shot.confidence)
+                # A capture converted in place replaces its CSV original.
+                for other in [f for f in rows if f != fileName and __getBinaryName(f) == fileName]:
+                    del rows[other]
+                if results:
+                    results.addData(datum)
+                changed = True
+            if changed:
+                __writeSummary([rows[f] for f in sorted(rows)], outputFolder, mode)
+                if results:
+                    results.finalize()
+            if once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if results:
+            results.finalize()
+            results.close()
+        if store:
+            store.evict()
+
+def __convert(inputs : typing.List[str], outputFolder : typing.Optional[str] = None):
+    # Only CSV captures, converted or not, so converting a folder twice never
+    # rewrites a .btc file onto itself.
+    for fileName in __findInputs(inputs, (DEFAULT_INPUT,), False):
+        folder : str = outputFolder if outputFolder is not None else os.path.dirname(fileName)
+        os.makedirs(folder or '.', exist_ok = True)
+        binaryName : str = os.path.join(folder, os.path.splitext(os.path.basename(fileName))[0] + shot.CAPTURE_EXTENSION)
+        print('converting {0} -> {1}...'.format(fileName, binaryName))
+        shot.capture.read(fileName).writeBinary(binaryName)
+
+def __parseDate(text : str) -> float:
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected an ISO date such as 2024-05-01, got {0}'.format(text))
+
+def __query(indexPath : str, confidences : typing.List[shot.ShotConfidence], minConfidence : typing.Optional[shot.ShotConfidence] = None,
+            minHiG : typing.Optional[float] = None, maxHiG : typing.Optional[float] = None, handedness : typing.Optional[shot.Handedness] = None,
+            since : typing.Optional[float] = None, until : typing.Optional[float] = None, name : typing.Optional[str] = None,
+            orderBy : str = 'hiG', descending : bool = True, limit : typing.Optional[int] = None, asCsv : bool = False):
+    COLUMNS = ('name', 'captured', 'handedness', 'confidence', 'shot', 'hiGConfidence', 'hiG', 'file')
+    if not os.path.exists(indexPath):
+        raise FileNotFoundError('no results index at {0}'.format(indexPath))
+    results : shotIndex.index = shotIndex.index(indexPath)
+    try:
+        rows = results.query(confidences, minConfidence, minHiG, maxHiG, handedness, since, until, name, orderBy, descending, limit)
+        total : int = results.getCount()
+    finally:
+        results.close()
+    table : typing.List[typing.List[str]] = []
+    for r in rows:
+        captured : str = '' if r['captured'] is None else time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['captured']))
+        table.append([r['name'], captured, r['handedness'], shot.ShotConfidence(r['confidence']).name, '{0:.3f}'.format(r['shot']),
+                      shot.ShotConfidence(r['hiGConfidence']).name, '{0:.3f}'.format(r['hiG']), r['file']])
+    if asCsv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(COLUMNS)
+        writer.writerows(table)
+        return
+    widths : typing.List[int] = [max([len(c)] + [len(t[i]) for t in table]) for i, c in enumerate(COLUMNS)]
+    for line in [list(COLUMNS)] + table:
+        print('  '.join(v.ljust(w) for v, w in zip(line, widths)).rstrip())
+    print('{0} of {1} shots'.format(len(table), total))
+
+def __parseSkip(names : typing.Optional[typing.List[str]]) -> typing.Set[Writer]:
+    skip : typing.Set[Writer] = set()
+    for name in names or []:
+        if name == 'data':
+            skip.update(DATA_WRITERS)
+        else:
+            skip.add(Writer(name))
+    return skip
+
+def __addWriterArguments(parser : argparse.ArgumentParser):
+    MODES = [m.name.lower() for m in shotOutput.xlsx.Mode]
+    parser.add_argument('-o', '--output', default = '.', help = 'output directory (default: current directory)')
+    parser.add_argument('--mode', choices = MODES, default = shotOutput.xlsx.Mode.Abbreviated.name.lower(), help = 'layout of the summary workbook')
+    parser.add_argument('--skip', action = 'append', choices = [w.value for w in Writer] + ['data'],
+                        help = "writer to leave out; 'data' skips all per-stream {0} workbooks (repeatable)".format(DATA_FOLDER))
+    parser.add_argument('--streaming', action = 'store_true', help = 'write the summary workbook in constant memory')
+    parser.add_argument('--decimation', type = int, default = 1, metavar = 'N', help = 'write every N-th sample to the per-stream {0} workbooks'.format(DATA_FOLDER))
+    parser.add_argument('--export', choices = [f.value for f in shotOutput.arrowData.Format], help = 'also export streams and shots to {0} (needs pyarrow)'.format(EXPORT_FOLDER))
+    parser.add_argument('--session', default = '', help = 'session partition of the export (default: start time)')
+    parser.add_argument('--plot', metavar = 'DIR', help = 'write decimated HTML plots of every capture to DIR')
+    __addUnitArguments(parser)
+    parser.add_argument('--index', metavar = 'DB', help = 'add every capture\'s shot results to the SQLite results index DB')
+    parser.add_argument('--pipeline', nargs = '?', type = int, default = 0, const = shotPipeline.DEFAULT_CAPACITY, metavar = 'DEPTH',
+                        help = 'run every output on its own thread behind a queue of DEPTH captures (default: {0}) and report stage throughput'.format(shotPipeline.DEFAULT_CAPACITY))
+    parser.add_argument('--finalize-workers', type = int, default = 1, metavar = 'N',
+                        help = 'close up to N workbooks at once in forked processes where fork is available and safe, i.e. without --index, --export or other threads (default: %(default)s, one by one)')
+
+def __parseUnitScale(text : str) -> typing.Tuple[str, float]:
+    # SENSOR=SCALE, where SCALE may be a fraction such as 2000/65536.
+    NAMES = {name.lower(): name for name in shot.DEFAULT_UNIT_SCALES}
+    name, separator, scale = text.partition('=')
+    try:
+        return NAMES[name.strip().lower()], float(fractions.Fraction(scale.strip()))
+    except (KeyError, ValueError, ZeroDivisionError):
+        raise argparse.ArgumentTypeError('expected SENSOR=SCALE with SENSOR one of {0}, got {1}'.format(', '.join(NAMES), text))
+
+def __addUnitArguments(parser : argparse.ArgumentParser):
+    parser.add_argument('--unit-scale', action = 'append', type = __parseUnitScale, metavar = 'SENSOR=SCALE',
+                        help = 'units per LSB of a sensor, e.g. gyro=2000/65536 (repeatable; defaults: {0})'.format(
+                            ', '.join('{0}={1:g}'.format(n.lower(), v) for n, v in shot.DEFAULT_UNIT_SCALES.items())))
+
+def __addTraceArguments(parser : argparse.ArgumentParser):
+    parser.add_argument('--trace', nargs = '?', const = '', metavar = 'PATH',
+                        help = 'time every stage of every file and print a summary; PATH also writes the trace (.csv or .json)')
+    parser.add_argument('--trace-memory', action = 'store_true', help = 'also trace allocation peaks (slower)')
+
+def __getTracer(args : argparse.Namespace) -> shotTrace.tracer:
+    if args.trace is None and not args.trace_memory:
+        return shotTrace.DISABLED
+    return shotTrace.tracer(True, args.trace_memory)
+
+def __reportTrace(tracer : shotTrace.tracer, args : argparse.Namespace):
+    if not tracer.enabled:
+        return
+    tracer.printSummary()
+    if args.trace:
+        tracer.write(args.trace)
+
+def __getExport(args : argparse.Namespace) -> typing.Optional[shotOutput.arrowData.Format]:
+    if not args.export:
+        return None
+    return shotOutput.arrowData.Format(args.export)
+
+def __getMode(name : str) -> shotOutput.xlsx.Mode:
+    return shotOutput.xlsx.Mode[name.capitalize()]
+
+def __addCacheArguments(parser : argparse.ArgumentParser, required : bool = False):
+    parser.add_argument('--cache', required = required, metavar = 'DIR', help = 'directory of the analysis cache')
+    parser.add_argument('--cache-size', type = int, default = shotCache.DEFAULT_MAX_BYTES >> 20, metavar = 'MB',
+                        help = 'evict least recently used entries above this size (default: %(default)s)')
+
+def __getCache(args : argparse.Namespace) -> typing.Optional[shotCache.cache]:
+    if not args.cache:
+        return None
+    return shotCache.cache(args.cache, args.cache_size << 20)
+
+def __cache(store : shotCache.cache, action : str, inputs : typing.List[str]):
+    if action == 'clear':
+        print('removed {0} entries'.format(store.clear()))
+    elif action == 'invalidate':
+        print('removed {0} entries'.format(store.invalidate(__findInputs(inputs))))
+    elif action == 'evict':
+        print('removed {0} entries'.format(store.evict()))
+    count, size = store.getSize()
+    print('{0}: {1} entries, {2:.1f} MB'.format(store.folder, count, size / (1 << 20)))
+
+def main(argv : typing.Optional[typing.List[str]] = None):
+    COMMANDS = ('run', 'merge', 'cache', 'watch', 'convert', 'report', 'query')
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['run'] + list(argv)
+    parser : argparse.ArgumentParser = argparse.ArgumentParser(prog = 'bowTorqueAnalyzer', description = 'Analyze bow torque captures.')
+    commands = parser.add_subparsers(dest = 'command')
+    run : argparse.ArgumentParser = commands.add_parser('run', help = 'analyze captures (default)')
+    run.add_argument('inputs', nargs = '*', default = [DEFAULT_INPUT], help = 'capture files, directories or globs (default: {0})'.format(DEFAULT_INPUT))
+    run.add_argument('-j', '--workers', type = int, default = DEFAULT_WORKERS, help = 'parallel worker processes (default: %(default)s)')
+    run.add_argument('--shard-index', type = int, default = 0, help = 'index of this shard, from 0')
+    run.add_argument('--shard-count', type = int, default = 1, help = 'number of shards; above 1 writes a shard file for merge instead of workbooks')
+    run.add_argument('--chunk-rows', type = int, default = 0, metavar = 'N', help = 'analyze captures N rows at a time in bounded memory')
+    run.add_argument('--readers', type = int, default = shotPipeline.DEFAULT_READERS, metavar = 'N', help = 'with --pipeline, threads reading captures ahead of the analysis (default: %(default)s)')
+    __addWriterArguments(run)
+    __addTraceArguments(run)
+    __addCacheArguments(run)
+    merge : argparse.ArgumentParser = commands.add_parser('merge', help = 'write workbooks from the shard files of a sharded run')
+    merge.add_argument('shards', nargs = '+', help = 'shard files written by run --shard-count')
+    __addWriterArguments(merge)
+    __addTraceArguments(merge)
+    watch : argparse.ArgumentParser = commands.add_parser('watch', help = 'analyze new or changed captures in a folder as they arrive')
+    watch.add_argument('folder', help = 'folder the rig writes captures to')
+    watch.add_argument('-o', '--output', default = '.', help = 'output directory (default: current directory)')
+    watch.add_argument('--mode', choices = [m.name.lower() for m in shotOutput.xlsx.Mode], default = shotOutput.xlsx.Mode.Abbreviated.name.lower(), help = 'layout of the summary')
+    watch.add_argument('--interval', type = float, default = DEFAULT_WATCH_INTERVAL, help = 'seconds between polls (default: %(default)s)')
+    watch.add_argument('--once', action = 'store_true', help = 'process what is there now and exit')
+    __addUnitArguments(watch)
+    watch.add_argument('--index', metavar = 'DB', help = 'add every capture\'s shot results to the SQLite results index DB')
+    __addCacheArguments(watch)
+    report : argparse.ArgumentParser = commands.add_parser('report', help = 'write one HTML dashboard of every capture')
+    report.add_argument('inputs', nargs = '*', default = [DEFAULT_INPUT], help = 'capture files, directories or globs (default: {0})'.format(DEFAULT_INPUT))
+    report.add_argument('-o', '--output', default = '.', help = 'output directory (default: current directory)')
+    report.add_argument('-j', '--workers', type = int, default = DEFAULT_WORKERS, help = 'parallel worker processes (default: %(default)s)')
+    report.add_argument('--mode', choices = [m.name.lower() for m in shotOutput.xlsx.Mode], default = shotOutput.xlsx.Mode.Abbreviated.name.lower(), help = 'summary columns the statistics cover')
+    report.add_argument('--radius', type = int, default = shot.WINDOW_RADIUS, help = 'samples shown on either side of each shot (default: %(default)s)')
+    report.add_argument('--chunk-rows', type = int, default = 0, metavar = 'N', help = 'analyze captures N rows at a time in bounded memory')
+    __addUnitArguments(report)
+    __addTraceArguments(report)
+    __addCacheArguments(report)
+    convert : argparse.ArgumentParser = commands.add_parser('convert', help = 'convert CSV captures to the binary {0} format'.format(shot.CAPTURE_EXTENSION))
+    convert.add_argument('inputs', nargs = '*', default = [DEFAULT_INPUT], help = 'capture files, directories or globs (default: {0})'.format(DEFAULT_INPUT))
+    convert.add_argument('-o', '--output', help = 'output directory (default: next to each capture)')
+    query : argparse.ArgumentParser = commands.add_parser('query', help = 'find shots in a results index written with --index')
+    query.add_argument('index', nargs = '?', default = shotIndex.DEFAULT_FILE_NAME, help = 'results index (default: %(default)s)')
+    query.add_argument('--confidence', action = 'append', choices = [c.name for c in shot.ShotConfidence], help = 'shot confidence to include (repeatable)')
+    query.add_argument('--min-confidence', choices = [c.name for c in shot.ShotConfidence], help = 'lowest shot confidence to include')
+    query.add_argument('--min-hig', type = float, metavar = 'G', help = 'lowest hiG shot magnitude in g')
+    query.add_argument('--max-hig', type = float, metavar = 'G', help = 'highest hiG shot magnitude in g')
+    query.add_argument('--handedness', choices = [h.name for h in shot.Handedness])
+    query.add_argument('--since', type = __parseDate, metavar = 'DATE', help = 'captures modified on or after DATE (ISO format)')
+    query.add_argument('--until', type = __parseDate, metavar = 'DATE', help = 'captures modified before DATE (ISO format)')
+    query.add_argument('--name', metavar = 'GLOB', help = 'capture name pattern, e.g. "range*"')
+    query.add_argument('--top', type = int, metavar = 'K', help = 'only the first K shots in order')
+    query.add_argument('--order-by', choices = shotIndex.COLUMN_NAMES, default = 'hiG', help = 'column to order by (default: %(default)s)')
+    query.add_argument('--ascending', action = 'store_true', help = 'smallest first instead of largest')
+    query.add_argument('--csv', action = 'store_true', help = 'print CSV instead of a table')
+    cache : argparse.ArgumentParser = commands.add_parser('cache', help = 'inspect or invalidate the analysis cache')
+    cache.add_argument('action', choices = ('info', 'clear', 'evict', 'invalidate'))
+    cache.add_argument('inputs', nargs = '*', help = 'captures to invalidate')
+    __addCacheArguments(cache, True)
+    args : argparse.Namespace = parser.parse_args(argv)
+    if args.command in ('run', 'merge', 'watch', 'report'):
+        shot.setUnitScales(dict(args.unit_scale or []))
+    if args.command == 'run':
+        if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+            parser.error('--shard-index must be in [0, --shard-count)')
+        if args.chunk_rows and args.cache:
+            parser.error('--chunk-rows cannot be combined with --cache, which stores whole streams')
+        if args.chunk_rows and args.shard_count > 1:
+            parser.error('--chunk-rows cannot be combined with --shard-count, since merge would reopen the captures for their streams')
+        tracer : shotTrace.tracer = __getTracer(args)
+        __process(args.inputs, args.output, args.workers, args.shard_index, args.shard_count, __getMode(args.mode), __parseSkip(args.skip), __getCache(args), args.streaming, args.decimation, __getExport(args), args.session, args.chunk_rows, tracer, args.plot, args.index, args.pipeline, args.readers, args.finalize_workers)
+        __reportTrace(tracer, args)
+    elif args.command == 'merge':
+        tracer : shotTrace.tracer = __getTracer(args)
+        __merge(args.shards, args.output, __getMode(args.mode), __parseSkip(args.skip), args.streaming, args.decimation, __getExport(args), args.session, tracer, args.plot, args.index, args.pipeline, args.finalize_workers)
+        __reportTrace(tracer, args)
+    elif args.command == 'watch':
+        __watch(args.folder, args.output, __getMode(args.mode), args.interval, __getCache(args), args.once, args.index)
+    elif args.command == 'report':
+        if not 0 <= args.radius <= shotReport.MAX_RADIUS:
+            parser.error('--radius must be in [0, {0}]'.format(shotReport.MAX_RADIUS))
+        if args.chunk_rows and args.cache:
+            parser.error('--chunk-rows cannot be combined with --cache, which stores whole streams')
+        tracer : shotTrace.tracer = __getTracer(args)
+        __report(args.inputs, args.output, args.workers, __getMode(args.mode), __getCache(args), args.chunk_rows, args.radius, tracer)
+        __reportTrace(tracer, args)
+    elif args.command == 'convert':
+        __convert(args.inputs, args.output)
+    elif args.command == 'query':
+        try:
+            __query(args.index, [shot.ShotConfidence[c] for c in args.confidence or []],
+                    shot.ShotConfidence[args.min_confidence] if args.min_confidence else None, args.min_hig, args.max_hig,
+                    shot.Handedness[args.handedness] if args.handedness else None, args.since, args.until, args.name,
+                    args.order_by, not args.ascending, args.top, args.csv)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+    elif args.command == 'cache':
+        __cache(__getCache(args), args.action, args.inputs)
 
 
 # === MAIN =====================================================================
 
 if __name__ == "__main__":
-    __process()
-else:
-    print("ERROR: bowTorqueAnalyzer needs to be the calling python module!")
-    
\ No newline at end of file
+    main()
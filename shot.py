@@ -1,11 +1,12 @@
 # === IMPORTS ==================================================================
 
 import enum
+import itertools
 import math
+import numpy as np
 import operator
 import os
 import string
-import struct
 import typing
 
 
@@ -32,6 +33,17 @@ SHOT_SEPARATION: int = 30
 
 LSB_TO_G_DIVISOR = 4096
 
+# Unit per LSB of each sensor, keyed by vector.Type name: deg/s for the gyro
+# and g for accel and hiG. Calibration vectors are in accel units. Change
+# them with setUnitScales() before any stream is converted, e.g. for a
+# sensor set to another range.
+DEFAULT_UNIT_SCALES = {
+    'Gyro': 1000 / 65536,
+    'Accel': 1 / LSB_TO_G_DIVISOR,
+    'HiG': 200 / 256,
+    }
+UNIT_SCALES = dict(DEFAULT_UNIT_SCALES)
+
 TYPE_IMU_GRYO = 1
 TYPE_IMU_ACCEL = 2
 TYPE_HI_G_ACCEL = 3
@@ -39,23 +51,126 @@ TYPE_CALIBRATION = 4
 TYPE_SETTINGS = 5
 TYPE_HI_G_ACCEL_COMP = 7
 
+# Bump whenever parsing or analysis changes so cached results are rebuilt.
+ANALYZER_VERSION = 1
+
+CAPTURE_EXTENSION = '.btc'
+CAPTURE_MAGIC = b'BTC1'
+CAPTURE_VERSION = 1
+# Fixed little-endian header of a binary capture, followed by the gyro, accel
+# and hiG blocks as (count, 3) little-endian int16 samples in that order.
+CAPTURE_HEADER = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('handedness', '<i2'),
+    ('calibration', '<f8', (3,)),
+    ('counts', '<u8', (3,)),
+    ])
+CAPTURE_SAMPLE = np.dtype('<i2')
+
+# Rows per block of the chunked reader, and samples kept on either side of
+# every peak and shot it finds.
+DEFAULT_CHUNK_ROWS = 1 << 16
+WINDOW_RADIUS = 20
+
+DETECT_VERY_HIGH_THRESHOLD = 40000
+DETECT_HIGH_THRESHOLD = 35000
+DETECT_MEDIUM_THRESHOLD = 30000
+DETECT_THRESHOLD = 22000
+DETECT_PAIR_ADD_THRESHOLD = 29000
+DETECT_PAIR_STRONG_THRESHOLD = 17000
+
 
 # === HELPER FUNCTIONS =========================================================
 
 def findThreeAxisMagnitude(x : float, y : float, z : float) -> float:
     return math.sqrt((x * x) + (y * y) + (z * z))
 
-def convertLsbToG(a : int) -> float:
-    return float(a / LSB_TO_G_DIVISOR)
+def setUnitScales(scales : typing.Dict[str, float]):
+    for name, scale in scales.items():
+        if name not in DEFAULT_UNIT_SCALES:
+            raise ValueError('unknown sensor {0}'.format(name))
+        UNIT_SCALES[name] = float(scale)
+
+def getUnitScale(type : 'vector.Type') -> float:
+    if type is vector.Type.Calibration:
+        type = vector.Type.Accel
+    return UNIT_SCALES.get(type.name, 1.0)
+
+def convertToUnits(a : np.ndarray, type : 'vector.Type') -> np.ndarray:
+    # One multiply over the whole array; every scale is a single factor.
+    return np.asarray(a, dtype = np.float64) * getUnitScale(type)
 
 def convertLsbToG(a : float) -> float:
-    return float(a / LSB_TO_G_DIVISOR)
+    return float(a * UNIT_SCALES['Accel'])
 
 def convertLsbToDeg(a : float) -> float:
-    return float(a * 1000 / 65536)
+    return float(a * UNIT_SCALES['Gyro'])
 
 def convertLsbToHiG(a : float) -> float:
-    return float(a * 200 /  256)
+    return float(a * UNIT_SCALES['HiG'])
+
+def findPeak(column: np.ndarray) -> int:
+    # argmax reports the first occurrence, so ties go to the earliest sample.
+    return int(np.argmax(column))
+
+def classifyShots(magnitude: np.ndarray, prevMagnitude: float = 0) -> np.ndarray:
+    '''
+    Shot confidence value of every sample in an accel magnitude column. The
+    pair rule compares each sample with the one before it; prevMagnitude
+    stands in for the sample before the first one.
+    '''
+    pair: np.ndarray = np.empty(len(magnitude), dtype = bool)
+    if len(magnitude) > 0:
+        first: float = magnitude[0]
+        pair[0] = (prevMagnitude >= DETECT_PAIR_STRONG_THRESHOLD or first >= DETECT_PAIR_STRONG_THRESHOLD) and (first + prevMagnitude) >= DETECT_PAIR_ADD_THRESHOLD
+        prev: np.ndarray = magnitude[:-1]
+        current: np.ndarray = magnitude[1:]
+        pair[1:] = ((prev >= DETECT_PAIR_STRONG_THRESHOLD) | (current >= DETECT_PAIR_STRONG_THRESHOLD)) & ((current + prev) >= DETECT_PAIR_ADD_THRESHOLD)
+    return np.select(
+        (magnitude >= DETECT_VERY_HIGH_THRESHOLD,
+         magnitude >= DETECT_HIGH_THRESHOLD,
+         magnitude >= DETECT_MEDIUM_THRESHOLD,
+         magnitude >= DETECT_THRESHOLD,
+         pair),
+        (ShotConfidence.VeryHigh.value,
+         ShotConfidence.High.value,
+         ShotConfidence.Medium.value,
+         ShotConfidence.Low.value,
+         ShotConfidence.VeryLow.value),
+        ShotConfidence.NoShot.value).astype(np.int8)
+
+def detectShot(magnitude: np.ndarray, offset: int = 0) -> typing.Tuple[int, ShotConfidence]:
+    '''
+    Index and confidence of the first shot at or after offset, or index 0 with
+    NoShot when there is none. The search works on a view of the column.
+    '''
+    prevMagnitude: float = 0
+    if offset > 0 and offset < len(magnitude):
+        prevMagnitude = magnitude[offset - 1]
+    tiers: np.ndarray = classifyShots(magnitude[offset:], prevMagnitude)
+    hits: np.ndarray = tiers != ShotConfidence.NoShot.value
+    if not hits.any():
+        return 0, ShotConfidence.NoShot
+    i: int = int(np.argmax(hits))
+    return offset + i, ShotConfidence(int(tiers[i]))
+
+def detectAllShots(magnitude: np.ndarray, separation: int = SHOT_SEPARATION) -> typing.List[typing.Tuple[int, ShotConfidence]]:
+    '''
+    Index and confidence of every shot in an accel magnitude column. Each
+    detection opens a refractory window of separation samples; the next shot
+    is the first hit after it, exactly as detectShot would find it when
+    called with offset = previous index + separation.
+    '''
+    tiers: np.ndarray = classifyShots(magnitude)
+    hits: np.ndarray = np.flatnonzero(tiers != ShotConfidence.NoShot.value)
+    shots: typing.List[typing.Tuple[int, ShotConfidence]] = []
+    k: int = 0
+    while k < len(hits):
+        i: int = int(hits[k])
+        shots.append((i, ShotConfidence(int(tiers[i]))))
+        k = int(np.searchsorted(hits, i + max(separation, 1)))
+    return shots
 
 
 # === CLASSES ==================================================================
@@ -68,38 +183,69 @@ class vector:
         HiG = 3
         Calibration = 4
         
+    __slots__ = ('__stream', '__index')
+        
     def __init__(self, d: typing.List[float], type: Type):
-        self.x: float = d[0]
-        self.y: float = d[1]
-        self.z: float = d[2]
-        self.type: self.Type = type
-        self.magnitude: float = findThreeAxisMagnitude(self.x, self.y, self.z)
-        self.xUnit: float = self.x
-        self.yUnit: float = self.y
-        self.zUnit: float = self.z
-        self.magnitudeUnit: float = self.magnitude
-        self.absX: float = abs(self.x)
-        self.absY: float = abs(self.y)
-        self.absZ: float = abs(self.z)
-        self.list: typing.List[float] = [self.x, self.y, self.z]
-        self.__createUnitValues()
-        
-    def __createUnitValues(self):
-        if self.type is self.Type.Gyro:
-            self.xUnit = convertLsbToDeg(self.xUnit)
-            self.yUnit = convertLsbToDeg(self.yUnit)
-            self.zUnit = convertLsbToDeg(self.zUnit)
-            self.magnitudeUnit = convertLsbToDeg(self.magnitudeUnit)
-        elif self.type is self.Type.Accel or self.type is self.Type.Calibration:
-            self.xUnit = convertLsbToG(self.xUnit)
-            self.yUnit = convertLsbToG(self.yUnit)
-            self.zUnit = convertLsbToG(self.zUnit)
-            self.magnitudeUnit = convertLsbToG(self.magnitudeUnit)
-        elif self.type is self.Type.HiG:
-            self.xUnit = convertLsbToHiG(self.xUnit)
-            self.yUnit = convertLsbToHiG(self.yUnit)
-            self.zUnit = convertLsbToHiG(self.zUnit)
-            self.magnitudeUnit = convertLsbToHiG(self.magnitudeUnit)
+        self.__stream: stream = stream(np.array([d[:3]], dtype = np.float64), type)
+        self.__index: int = 0
+        
+    def fromStream(s: 'stream', index: int) -> 'vector':
+        v: vector = vector.__new__(vector)
+        v.__stream = s
+        v.__index = index
+        return v
+        
+    @property
+    def x(self) -> float:
+        return float(self.__stream.values[self.__index, 0])
+        
+    @property
+    def y(self) -> float:
+        return float(self.__stream.values[self.__index, 1])
+        
+    @property
+    def z(self) -> float:
+        return float(self.__stream.values[self.__index, 2])
+        
+    @property
+    def type(self) -> Type:
+        return self.__stream.type
+        
+    @property
+    def magnitude(self) -> float:
+        return float(self.__stream.magnitude[self.__index])
+        
+    @property
+    def xUnit(self) -> float:
+        return float(self.__stream.unit[self.__index, 0])
+        
+    @property
+    def yUnit(self) -> float:
+        return float(self.__stream.unit[self.__index, 1])
+        
+    @property
+    def zUnit(self) -> float:
+        return float(self.__stream.unit[self.__index, 2])
+        
+    @property
+    def magnitudeUnit(self) -> float:
+        return float(self.__stream.magnitudeUnit[self.__index])
+        
+    @property
+    def absX(self) -> float:
+        return abs(self.x)
+        
+    @property
+    def absY(self) -> float:
+        return abs(self.y)
+        
+    @property
+    def absZ(self) -> float:
+        return abs(self.z)
+        
+    @property
+    def list(self) -> typing.List[float]:
+        return [self.x, self.y, self.z]
         
     def getVectorSum(self) -> int:
         return abs(self.x) + abs(self.y) + abs(self.z)
@@ -121,8 +267,124 @@ class vector:
     
     def leftHandEntryString() -> str:
         return '{0}, {1}, {2}, {3}'.format(int(TYPE_SETTINGS), int(Handedness.Left.value), int(0), int(0))
+
+
+class stream:
+    '''
+    Columnar store for one sensor stream. All samples live in a single (n, 3)
+    array; magnitude, abs and unit columns are computed in bulk on first access
+    and cached. Indexing returns a lightweight vector view into a row and
+    slicing returns a stream sharing the same memory.
+    '''
+    def __init__(self, values: np.ndarray, type: vector.Type = vector.Type.Unedefined):
+        self.values: np.ndarray = values
+        self.type: vector.Type = type
+        self.__magnitude: np.ndarray = None
+        self.__abs: np.ndarray = None
+        self.__unit: np.ndarray = None
+        self.__magnitudeUnit: np.ndarray = None
+        
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # Derived columns are cheap to rebuild, so only the raw samples are
+        # shipped between processes.
+        return {'values': self.values, 'type': self.type}
+    
+    def __setstate__(self, state: typing.Dict[str, typing.Any]):
+        self.__init__(state['values'], state['type'])
+        
+    def __len__(self) -> int:
+        return len(self.values)
+        
+    def __getitem__(self, key: typing.Union[int, slice]) -> typing.Union[vector, 'stream']:
+        if isinstance(key, slice):
+            s: stream = stream(self.values[key], self.type)
+            if self.__magnitude is not None:
+                s.__magnitude = self.__magnitude[key]
+            if self.__abs is not None:
+                s.__abs = self.__abs[key]
+            if self.__unit is not None:
+                s.__unit = self.__unit[key]
+            if self.__magnitudeUnit is not None:
+                s.__magnitudeUnit = self.__magnitudeUnit[key]
+            return s
+        length: int = len(self.values)
+        index: int = operator.index(key)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError('stream index out of range')
+        return vector.fromStream(self, index)
+    
+    def __iter__(self) -> typing.Iterator[vector]:
+        for i in range(len(self.values)):
+            yield vector.fromStream(self, i)
+            
+    @property
+    def x(self) -> np.ndarray:
+        return self.values[:, 0]
+    
+    @property
+    def y(self) -> np.ndarray:
+        return self.values[:, 1]
+    
+    @property
+    def z(self) -> np.ndarray:
+        return self.values[:, 2]
+        
+    @property
+    def magnitude(self) -> np.ndarray:
+        if self.__magnitude is None:
+            v: np.ndarray = self.values.astype(np.float64)
+            x: np.ndarray = v[:, 0]
+            y: np.ndarray = v[:, 1]
+            z: np.ndarray = v[:, 2]
+            self.__magnitude = np.sqrt((x * x) + (y * y) + (z * z))
+        return self.__magnitude
+    
+    @property
+    def abs(self) -> np.ndarray:
+        if self.__abs is None:
+            self.__abs = np.abs(self.values.astype(np.float64))
+        return self.__abs
+    
+    @property
+    def unit(self) -> np.ndarray:
+        if self.__unit is None:
+            self.__unit = convertToUnits(self.values, self.type)
+        return self.__unit
+    
+    @property
+    def magnitudeUnit(self) -> np.ndarray:
+        if self.__magnitudeUnit is None:
+            self.__magnitudeUnit = convertToUnits(self.magnitude, self.type)
+        return self.__magnitudeUnit
+    
+    def toList(self) -> typing.List[typing.List[float]]:
+        return self.values.astype(np.float64).tolist()
+    
     
+def findPeaks(s: stream) -> typing.List[int]:
+    '''
+    Indices of the largest magnitude, |x|, |y| and |z| samples of a stream,
+    found with a single argmax over one (n, 4) block. Ties go to the earliest
+    sample.
+    '''
+    columns: np.ndarray = np.empty((len(s), 4), dtype = np.float64)
+    columns[:, 0] = s.magnitude
+    columns[:, 1:] = s.values
+    np.abs(columns[:, 1:], out = columns[:, 1:])
+    return [int(i) for i in np.argmax(columns, axis = 0)]
     
+    
+def packSamples(d: typing.List[typing.List[float]]) -> np.ndarray:
+    if isinstance(d, np.ndarray) and d.dtype == np.int16:
+        return d.reshape(-1, 3)
+    a: np.ndarray = np.array(d, dtype = np.float64).reshape(-1, 3)
+    if np.all((a >= np.iinfo(np.int16).min) & (a <= np.iinfo(np.int16).max) & (a == np.floor(a))):
+        return a.astype(np.int16)
+    return a
+        
+        
 class vectorDatum:
     def __init__(self, v: vector, index: int = 0):
         self.v: vector = v
@@ -135,143 +397,496 @@ class shotDatum:
         self.confidence: ShotConfidence = confidence
         
         
-class data:
+class window:
+    '''
+    Samples [start, end) of one stream around index. values, unit and
+    magnitudeUnit are views into the stream's columns, or converted for the
+    window alone, never copies or conversions of the whole stream.
+    '''
+    def __init__(self, s: stream, start: int, index: int):
+        self.stream: stream = s
+        self.start: int = start
+        self.end: int = start + len(s)
+        self.index: int = index
+        
+    def __len__(self) -> int:
+        return len(self.stream)
+    
+    @property
+    def offset(self) -> int:
+        # Position of index within the window.
+        return self.index - self.start
+    
+    @property
+    def values(self) -> np.ndarray:
+        return self.stream.values
+    
+    @property
+    def unit(self) -> np.ndarray:
+        return self.stream.unit
+    
+    @property
+    def magnitudeUnit(self) -> np.ndarray:
+        return self.stream.magnitudeUnit
+        
+        
+class capture:
+    '''
+    Raw contents of a capture file, partitioned by row type. The whole file is
+    parsed in one pass into a (rows, 4) table and every stream is extracted
+    with boolean masks, so no Python code runs per line.
+    '''
     class LineIndex(enum.Enum):
         Type = 0
         X = 1
         Y = 2
         Z = 3
     NUM_LINE_INDICES = len(LineIndex)
+    
+    HI_G_UPPER = 127.0
+    HI_G_LOWER = -128.0
+    
+    def __init__(self, table: np.ndarray):
+        table = np.asarray(table, dtype = np.float64).reshape(-1, self.NUM_LINE_INDICES)
+        types: np.ndarray = table[:, self.LineIndex.Type.value].astype(np.int64)
+        xyz: np.ndarray = table[:, self.LineIndex.X.value:]
+        self.gyro: np.ndarray = xyz[types == TYPE_IMU_GRYO]
+        self.accel: np.ndarray = xyz[types == TYPE_IMU_ACCEL]
+        self.hiG: np.ndarray = capture.__extractHiG(types, xyz)
+        self.calibration: typing.Optional[np.ndarray] = None
+        self.handedness: typing.Optional[Handedness] = None
+        calibration: np.ndarray = xyz[types == TYPE_CALIBRATION]
+        if len(calibration) > 0:
+            self.calibration = calibration[-1]
+        settings: np.ndarray = xyz[types == TYPE_SETTINGS]
+        if len(settings) > 0:
+            self.handedness = Handedness.Right
+            if int(settings[-1, 0]) == Handedness.Left.value:
+                self.handedness = Handedness.Left
+                
+    def read(filePath: str) -> 'capture':
+        if filePath.endswith(CAPTURE_EXTENSION):
+            return capture.readBinary(filePath)
+        table: np.ndarray = np.loadtxt(filePath, delimiter = ',', usecols = range(capture.NUM_LINE_INDICES), ndmin = 2)
+        return capture(table)
+    
+    def readBinary(filePath: str) -> 'capture':
+        '''
+        Opens a binary capture without parsing it. The sample blocks are views
+        into a read-only memory map, so pages are only read as they are used.
+        '''
+        raw: np.ndarray = np.memmap(filePath, dtype = np.uint8, mode = 'r')
+        if len(raw) < CAPTURE_HEADER.itemsize:
+            raise ValueError('{0}: truncated capture header'.format(filePath))
+        header: np.void = raw[:CAPTURE_HEADER.itemsize].view(CAPTURE_HEADER)[0]
+        if header['magic'] != CAPTURE_MAGIC or header['version'] != CAPTURE_VERSION:
+            raise ValueError('{0}: not a version {1} binary capture'.format(filePath, CAPTURE_VERSION))
+        blocks: typing.List[np.ndarray] = []
+        offset: int = CAPTURE_HEADER.itemsize
+        for count in header['counts'].tolist():
+            end: int = offset + count * 3 * CAPTURE_SAMPLE.itemsize
+            if end > len(raw):
+                raise ValueError('{0}: truncated sample block'.format(filePath))
+            blocks.append(np.asarray(raw[offset:end]).view(CAPTURE_SAMPLE).reshape(-1, 3))
+            offset = end
+        calibration: typing.Optional[np.ndarray] = None
+        if not np.isnan(header['calibration']).any():
+            calibration = header['calibration'].astype(np.float64)
+        handedness: typing.Optional[Handedness] = None
+        if header['handedness'] >= 0:
+            handedness = Handedness(int(header['handedness']))
+        return capture.__fromStreams(blocks[0], blocks[1], blocks[2], calibration, handedness)
+    
+    def readChunks(filePath: str, chunkRows: int = DEFAULT_CHUNK_ROWS, blocks: typing.Optional[typing.Set[int]] = None) -> typing.Iterator['capture']:
+        '''
+        The capture as a sequence of partial captures of at most chunkRows
+        rows each, so only one block is ever held in memory. Calibration and
+        handedness are reported by the blocks they appear in. With blocks
+        given, only those block numbers are parsed and yielded.
+        '''
+        if filePath.endswith(CAPTURE_EXTENSION):
+            c: capture = capture.readBinary(filePath)
+            for i, start in enumerate(range(0, max(len(c.gyro), len(c.accel), len(c.hiG), 1), chunkRows)):
+                end: int = start + chunkRows
+                if blocks is None or i in blocks:
+                    yield capture.__fromStreams(c.gyro[start:end], c.accel[start:end], c.hiG[start:end], c.calibration, c.handedness)
+            return
+        with open(filePath) as file:
+            for i in itertools.count():
+                lines: typing.List[str] = list(itertools.islice(file, chunkRows))
+                if not lines:
+                    return
+                if blocks is None or i in blocks:
+                    yield capture(np.loadtxt(lines, delimiter = ',', usecols = range(capture.NUM_LINE_INDICES), ndmin = 2))
+    
+    def __fromStreams(gyro: np.ndarray, accel: np.ndarray, hiG: np.ndarray, calibration: typing.Optional[np.ndarray], handedness: typing.Optional[Handedness]) -> 'capture':
+        c: capture = capture.__new__(capture)
+        c.gyro = gyro
+        c.accel = accel
+        c.hiG = hiG
+        c.calibration = calibration
+        c.handedness = handedness
+        return c
+    
+    def writeBinary(self, filePath: str):
+        blocks: typing.List[np.ndarray] = [packSamples(a) for a in (self.gyro, self.accel, self.hiG)]
+        if any(b.dtype != np.int16 for b in blocks):
+            raise ValueError('{0}: samples do not fit in int16'.format(filePath))
+        header: np.ndarray = np.zeros(1, dtype = CAPTURE_HEADER)
+        header['magic'] = CAPTURE_MAGIC
+        header['version'] = CAPTURE_VERSION
+        header['handedness'] = -1 if self.handedness is None else self.handedness.value
+        header['calibration'] = np.nan if self.calibration is None else self.calibration
+        header['counts'] = [len(b) for b in blocks]
+        with open(filePath, 'wb') as file:
+            file.write(header.tobytes())
+            for b in blocks:
+                file.write(b.astype(CAPTURE_SAMPLE).tobytes())
+    
+    def limitHiG(a: np.ndarray) -> np.ndarray:
+        return np.where((a > capture.HI_G_UPPER) | (a < capture.HI_G_LOWER), 0, a)
+    
+    def decodeHiGComp(xyz: np.ndarray) -> np.ndarray:
+        # Each X/Y/Z column carries two signed bytes of a little-endian int16,
+        # so the row X0 X1 Y0 Y1 Z0 Z1 holds the two samples (X0, X1, Y0) and
+        # (Y1, Z0, Z1) back to back.
+        packed: np.ndarray = np.asarray(xyz, dtype = np.float64).reshape(-1, 3)
+        if np.any((packed < np.iinfo(np.int16).min) | (packed > np.iinfo(np.int16).max)):
+            raise OverflowError('packed hiG value out of int16 range')
+        words: np.ndarray = np.ascontiguousarray(packed.astype('<i2'))
+        samples: np.ndarray = words.view(np.int8).reshape(-1, 3)
+        return capture.limitHiG(samples.astype(np.float64))
+    
+    def __extractHiG(types: np.ndarray, xyz: np.ndarray) -> np.ndarray:
+        rows: np.ndarray = np.flatnonzero((types == TYPE_HI_G_ACCEL) | (types == TYPE_HI_G_ACCEL_COMP))
+        packed: np.ndarray = types[rows] == TYPE_HI_G_ACCEL_COMP
+        # Packed rows expand to two samples, so each row starts where the
+        # samples of all preceding hiG rows end.
+        counts: np.ndarray = np.where(packed, 2, 1)
+        starts: np.ndarray = np.cumsum(counts) - counts
+        hiG: np.ndarray = np.empty((int(counts.sum()), 3), dtype = np.float64)
+        hiG[starts[~packed]] = capture.limitHiG(xyz[rows[~packed]])
+        pairs: np.ndarray = capture.decodeHiGComp(xyz[rows[packed]]).reshape(-1, 2, 3)
+        hiG[starts[packed]] = pairs[:, 0]
+        hiG[starts[packed] + 1] = pairs[:, 1]
+        return hiG
+        
+        
+class scanner:
+    '''
+    Running analysis of a capture fed one block at a time. Peaks keep the
+    earliest sample on ties, and the shot detector carries the last accel
+    magnitude and the refractory window across blocks, so every index matches
+    the whole-file analysis exactly.
+    '''
+    PEAKS = ('maxGyro', 'maxAccel', 'maxHiG', 'maxAccelX', 'maxAccelY', 'maxAccelZ')
+    
+    def __init__(self, separation: int = SHOT_SEPARATION, maxShots: int = 2):
+        self.lengths: typing.Dict[vector.Type, int] = {vector.Type.Gyro: 0, vector.Type.Accel: 0, vector.Type.HiG: 0}
+        self.calibration: typing.Optional[np.ndarray] = None
+        self.handedness: typing.Optional[Handedness] = None
+        self.peaks: typing.Dict[str, int] = {}
+        self.shots: typing.List[typing.Tuple[int, ShotConfidence]] = []
+        self.blocks: typing.List[typing.Dict[vector.Type, int]] = []
+        self.__peakValues: typing.Dict[str, float] = {}
+        self.__separation: int = max(separation, 1)
+        self.__maxShots: int = maxShots
+        self.__prevMagnitude: float = 0
+        self.__nextShot: int = 0
+        
+    def add(self, c: capture):
+        if c.calibration is not None:
+            self.calibration = c.calibration
+        if c.handedness is not None:
+            self.handedness = c.handedness
+        gyro: stream = stream(c.gyro, vector.Type.Gyro)
+        accel: stream = stream(c.accel, vector.Type.Accel)
+        hiG: stream = stream(c.hiG, vector.Type.HiG)
+        if len(gyro) > 0:
+            self.__addPeak('maxGyro', gyro.magnitude, findPeak(gyro.magnitude), vector.Type.Gyro)
+        if len(accel) > 0:
+            peaks: typing.List[int] = findPeaks(accel)
+            self.__addPeak('maxAccel', accel.magnitude, peaks[0], vector.Type.Accel)
+            self.__addPeak('maxAccelX', accel.abs[:, 0], peaks[1], vector.Type.Accel)
+            self.__addPeak('maxAccelY', accel.abs[:, 1], peaks[2], vector.Type.Accel)
+            self.__addPeak('maxAccelZ', accel.abs[:, 2], peaks[3], vector.Type.Accel)
+            self.__addShots(accel.magnitude)
+        if len(hiG) > 0:
+            self.__addPeak('maxHiG', hiG.magnitude, findPeak(hiG.magnitude), vector.Type.HiG)
+        self.blocks.append(dict(self.lengths))
+        for s in (gyro, accel, hiG):
+            self.lengths[s.type] += len(s)
+            
+    def __addPeak(self, name: str, column: np.ndarray, i: int, type: vector.Type):
+        # Only a strictly larger value replaces the peak of an earlier block.
+        if name not in self.peaks or column[i] > self.__peakValues[name]:
+            self.peaks[name] = self.lengths[type] + i
+            self.__peakValues[name] = float(column[i])
+            
+    def __addShots(self, magnitude: np.ndarray):
+        offset: int = self.lengths[vector.Type.Accel]
+        tiers: np.ndarray = classifyShots(magnitude, self.__prevMagnitude)
+        hits: np.ndarray = np.flatnonzero(tiers != ShotConfidence.NoShot.value)
+        k: int = int(np.searchsorted(hits, self.__nextShot - offset))
+        while k < len(hits) and len(self.shots) < self.__maxShots:
+            i: int = int(hits[k])
+            self.shots.append((offset + i, ShotConfidence(int(tiers[i]))))
+            self.__nextShot = offset + i + self.__separation
+            k = int(np.searchsorted(hits, i + self.__separation))
+        self.__prevMagnitude = float(magnitude[-1])
+        
+    def getIndices(self, type: vector.Type) -> typing.List[int]:
+        # Every index the summary may look around in a stream; ranges are
+        # taken from any stream at the accel shot and the hiG peak.
+        indices: typing.List[int] = [0] + [i for i, confidence in self.shots] + list(self.peaks.values())
+        return sorted(set(i for i in indices if i < self.lengths[type]))
+    
+    
+class data:
+    '''
+    Analysis of one capture file. Nothing is read in the constructor. The
+    first access of any stream, calibration or handedness parses the whole
+    file (a binary capture is only mapped); each stream is then packed when it
+    is first touched, and its parsed samples are dropped right away. Every
+    peak and shot is found on first access and cached. evaluate() runs
+    everything up front.
+    '''
+    LineIndex = capture.LineIndex
+    NUM_LINE_INDICES = capture.NUM_LINE_INDICES
 
     def __init__(self, fileName: str):
-        self.fileName: str = fileName
-        self.filePath: str = ''
+        self.fileName: str = os.path.basename(fileName)
+        self.filePath: str = os.path.join(os.getcwd(), fileName) if fileName else ''
         self.name: str = ''
-        self.gyro: typing.List[vector] = []
-        self.accel: typing.List[vector] = []
-        self.hiG: typing.List[vector] = []
-        self.calibration: vector = vector([0, 0, 0], vector.Type.Calibration)
-        self.handedness: Handedness = Handedness.Right
-        self.maxGyro: vectorDatum
-        self.maxAccel: vectorDatum
-        self.maxHiG: vectorDatum
-        self.maxAccelX: vectorDatum
-        self.maxAccelY: vectorDatum
-        self.maxAccelZ: vectorDatum
-        self.shot: shotDatum
-        self.altShot: shotDatum
-        self.hiGShot: shotDatum
+        self.__capture: typing.Optional[capture] = None
+        self.__gyro: typing.Optional[stream] = None
+        self.__accel: typing.Optional[stream] = None
+        self.__hiG: typing.Optional[stream] = None
+        self.__calibration: typing.Optional[vector] = None
+        self.__handedness: typing.Optional[Handedness] = None
+        self.__maxGyro: typing.Optional[vectorDatum] = None
+        self.__maxAccel: typing.Optional[vectorDatum] = None
+        self.__maxHiG: typing.Optional[vectorDatum] = None
+        self.__maxAccelX: typing.Optional[vectorDatum] = None
+        self.__maxAccelY: typing.Optional[vectorDatum] = None
+        self.__maxAccelZ: typing.Optional[vectorDatum] = None
+        self.__shot: typing.Optional[shotDatum] = None
+        self.__altShot: typing.Optional[shotDatum] = None
+        self.__hiGShot: typing.Optional[shotDatum] = None
+        self.__lengths: typing.Dict[vector.Type, int] = {}
+        self.__windows: typing.Dict[vector.Type, typing.List[typing.Tuple[int, stream]]] = {}
         if self.fileName:
+            self.name = self.fileName.replace('.csv', '').replace(CAPTURE_EXTENSION, '')
+            self.numIMU = 0
+        else:
+            self.__gyro = stream(np.zeros((0, 3), dtype = np.int16), vector.Type.Gyro)
+            self.__accel = stream(np.zeros((0, 3), dtype = np.int16), vector.Type.Accel)
+            self.__hiG = stream(np.zeros((0, 3), dtype = np.int16), vector.Type.HiG)
+            self.__calibration = vector([0, 0, 0], vector.Type.Calibration)
+            self.__handedness = Handedness.Right
+            
+    def evaluate(self) -> 'data':
+        self.calibration
+        self.maxGyro
+        self.maxAccel
+        self.maxHiG
+        self.shot
+        self.hiGShot
+        return self
+        
+    def __process(self) -> capture:
+        if self.__capture is None:
+            c: capture = capture.read(self.filePath)
+            self.__setSettings(c.calibration, c.handedness)
+            self.__capture = c
+        return self.__capture
+    
+    def __setSettings(self, calibration: typing.Optional[np.ndarray], handedness: typing.Optional[Handedness]):
+        if self.__handedness is None:
+            self.__handedness = Handedness.Right
+            if handedness is not None:
+                self.__handedness = handedness
+        if self.__calibration is None:
+            if calibration is not None:
+                self.__calibration = vector(calibration, vector.Type.Calibration)
+            elif self.__handedness is Handedness.Left:
+                self.__calibration = vector([0.280273, -0.979248, 0.011719], vector.Type.Calibration)
+            else:
+                self.__calibration = vector([-0.280273, -0.979248, -0.011719], vector.Type.Calibration)
+    
+    def __pack(self, field: str, type: vector.Type) -> stream:
+        # The parsed samples of a field are only needed until its own stream
+        # is packed, and the capture until all three are.
+        c: capture = self.__process()
+        s: stream = stream(packSamples(getattr(c, field)), type)
+        setattr(c, field, None)
+        if c.gyro is None and c.accel is None and c.hiG is None:
+            self.__capture = None
+        return s
+        
+    @property
+    def gyro(self) -> stream:
+        if self.__gyro is None:
+            self.__gyro = self.__pack('gyro', vector.Type.Gyro)
+        return self.__gyro
+    
+    @property
+    def accel(self) -> stream:
+        if self.__accel is None:
+            self.__accel = self.__pack('accel', vector.Type.Accel)
+        return self.__accel
+    
+    @property
+    def hiG(self) -> stream:
+        if self.__hiG is None:
+            self.__hiG = self.__pack('hiG', vector.Type.HiG)
+        return self.__hiG
+    
+    @property
+    def calibration(self) -> vector:
+        if self.__calibration is None:
             self.__process()
-            self.__analyze()
+        return self.__calibration
+    
+    @property
+    def handedness(self) -> Handedness:
+        if self.__handedness is None:
+            self.__process()
+        return self.__handedness
+    
+    @property
+    def maxGyro(self) -> vectorDatum:
+        if self.__maxGyro is None:
+            self.__analyzeGyro()
+        return self.__maxGyro
+    
+    @property
+    def maxAccel(self) -> vectorDatum:
+        if self.__maxAccel is None:
+            self.__analyzeAccel()
+        return self.__maxAccel
+    
+    @property
+    def maxAccelX(self) -> vectorDatum:
+        if self.__maxAccelX is None:
+            self.__analyzeAccel()
+        return self.__maxAccelX
+    
+    @property
+    def maxAccelY(self) -> vectorDatum:
+        if self.__maxAccelY is None:
+            self.__analyzeAccel()
+        return self.__maxAccelY
+    
+    @property
+    def maxAccelZ(self) -> vectorDatum:
+        if self.__maxAccelZ is None:
+            self.__analyzeAccel()
+        return self.__maxAccelZ
+    
+    @property
+    def maxHiG(self) -> vectorDatum:
+        if self.__maxHiG is None:
+            self.__analyzeHiG()
+        return self.__maxHiG
+    
+    @property
+    def shot(self) -> shotDatum:
+        if self.__shot is None:
+            self.__processShot()
+        return self.__shot
+    
+    @property
+    def altShot(self) -> shotDatum:
+        if self.__altShot is None:
             self.__processShot()
+        return self.__altShot
+    
+    @property
+    def hiGShot(self) -> shotDatum:
+        if self.__hiGShot is None:
+            self.__hiGShot = self.__findHiGShot()
+        return self.__hiGShot
         
-    def __limitHiG(n : float) -> float:
-        UPPER = 127.0
-        LOWER = -128.0
-        if n > UPPER or n < LOWER:
-            n = 0
-        return n
+    def __analyze(self):
+        self.__analyzeGyro()
+        self.__analyzeAccel()
+        self.__analyzeHiG()
         
-    def __process(self):
-        if self.fileName:
-            self.name = self.fileName.replace('.csv', '')
-            self.filePath = os.path.join(os.getcwd(), self.fileName)
-            with open(self.filePath, 'r') as file:
-                readLines = file.readlines()
-            file.close()
-            self.numIMU = 0
-            processedCalibration: bool = False
-            for line in readLines:
-                line = line.strip()
-                entries = line.split(',')
-                type: int = int(entries[self.LineIndex.Type.value])
-                d: typing.List[float] = [float(entries[self.LineIndex.X.value]),
-                                         float(entries[self.LineIndex.Y.value]),
-                                         float(entries[self.LineIndex.Z.value])]
-                #v: vector = vector(float(entries[self.LineIndex.X.value]),
-                #                   float(entries[self.LineIndex.Y.value]),
-                #                   float(entries[self.LineIndex.Z.value]))
-                
-                if (type == TYPE_IMU_GRYO):
-                    v: vector = vector(d, vector.Type.Gyro)
-                    self.gyro.append(v)
-                elif (type == TYPE_IMU_ACCEL):
-                    v: vector = vector(d, vector.Type.Accel)
-                    self.accel.append(v)
-                elif (type == TYPE_HI_G_ACCEL):
-                    d = list(map(data.__limitHiG, d))
-                    v: vector = vector(d, vector.Type.HiG)
-                    self.hiG.append(v)
-                elif (type == TYPE_CALIBRATION):
-                    v: vector = vector(d, vector.Type.Calibration)
-                    self.calibration = v
-                    processedCalibration = True
-                elif (type == TYPE_SETTINGS):
-                    n = int(entries[self.LineIndex.X.value])
-                    self.handedness = Handedness.Right
-                    if (n == Handedness.Left.value):
-                        self.handedness = Handedness.Left
-                elif (type == TYPE_HI_G_ACCEL_COMP):
-                    FORMAT : str = '<2b'
-                    ENDIANNESS : str = 'little'
-                    bytes = int(entries[self.LineIndex.X.value]).to_bytes(2, ENDIANNESS, signed = True)
-                    x = struct.unpack(FORMAT, bytes)
-                    bytes = int(entries[self.LineIndex.Y.value]).to_bytes(2, ENDIANNESS, signed = True)
-                    y = struct.unpack(FORMAT, bytes)
-                    bytes = int(entries[self.LineIndex.Z.value]).to_bytes(2, ENDIANNESS, signed = True)
-                    z = struct.unpack(FORMAT, bytes)
-                    d: typing.List[float] = [data.__limitHiG(float(x[0])),
-                                             data.__limitHiG(float(x[1])),
-                                             data.__limitHiG(float(y[0]))]
-                    v: vector = vector(d, vector.Type.HiG)
-                    self.hiG.append(v)
-                    d: typing.List[float] = [data.__limitHiG(float(y[1])),
-                                             data.__limitHiG(float(z[0])),
-                                             data.__limitHiG(float(z[1]))]
-                    v: vector = vector(d, vector.Type.HiG)
-                    self.hiG.append(v)
-            if not processedCalibration:
-                if self.handedness is Handedness.Left:
-                    self.calibration = vector([0.280273, -0.979248, 0.011719], vector.Type.Calibration)
-                else:
-                    self.calibration = vector([-0.280273, -0.979248, -0.011719], vector.Type.Calibration)
+    def __analyzeGyro(self):
+        i: int = findPeak(self.gyro.magnitude)
+        self.__maxGyro = vectorDatum(self.gyro[i], i)
         
-    def __analyze(self):
-        MAGNITUDE = 'magnitude'
-        v: vector = max(self.gyro, key = operator.attrgetter(MAGNITUDE))
-        i: int = self.gyro.index(v)
-        self.maxGyro = vectorDatum(v, i)
+    def __analyzeAccel(self):
+        peaks: typing.List[int] = findPeaks(self.accel)
+        self.__maxAccel = vectorDatum(self.accel[peaks[0]], peaks[0])
+        self.__maxAccelX = vectorDatum(self.accel[peaks[1]], peaks[1])
+        self.__maxAccelY = vectorDatum(self.accel[peaks[2]], peaks[2])
+        self.__maxAccelZ = vectorDatum(self.accel[peaks[3]], peaks[3])
         
-        v: vector = max(self.accel, key = operator.attrgetter(MAGNITUDE))
-        i: int = self.accel.index(v)
-        self.maxAccel = vectorDatum(v, i)
+    def __analyzeHiG(self):
+        i: int = findPeak(self.hiG.magnitude)
+        self.__maxHiG = vectorDatum(self.hiG[i], i)
         
-        v: vector = max(self.hiG, key = operator.attrgetter(MAGNITUDE))
-        i: int = self.hiG.index(v)
-        self.maxHiG = vectorDatum(v, i)
+    def __processShot(self):
+        self.__resolveShots(self.findAllShots())
         
-        v: vector = max(self.accel, key = operator.attrgetter('absX'))
-        i: int = self.accel.index(v)
-        self.maxAccelX = vectorDatum(v, i)
+    def __resolveShots(self, shots: typing.List[shotDatum]):
+        self.__shot = shots[0] if len(shots) > 0 else self.__noShot()
+        self.__altShot = shots[1] if len(shots) > 1 else self.__noShot()
+        if self.__shot.confidence != ShotConfidence.NoShot and self.__altShot.confidence != ShotConfidence.NoShot:
+            if self.__altShot.datum.v.magnitude > self.__shot.datum.v.magnitude:
+                self.__shot.confidence = ShotConfidence.VeryLow
+        if self.__shot.confidence == ShotConfidence.NoShot:
+            self.__shot.datum = self.maxAccel
         
-        v: vector = max(self.accel, key = operator.attrgetter('absY'))
-        i: int = self.accel.index(v)
-        self.maxAccelY = vectorDatum(v, i)
+
+    def __noShot(self) -> shotDatum:
+        return shotDatum(vectorDatum(self.getWindow(vector.Type.Accel, 0, 1)[0], 0), ShotConfidence.NoShot)
         
-        v: vector = max(self.accel, key = operator.attrgetter('absZ'))
-        i: int = self.accel.index(v)
-        self.maxAccelZ = vectorDatum(v, i)
+    def __getStream(self, type: vector.Type) -> stream:
+        if type is vector.Type.Gyro:
+            return self.gyro
+        elif type is vector.Type.Accel:
+            return self.accel
+        return self.hiG
+    
+    def __isLoaded(self, type: vector.Type) -> bool:
+        if type is vector.Type.Gyro:
+            return self.__gyro is not None
+        elif type is vector.Type.Accel:
+            return self.__accel is not None
+        return self.__hiG is not None
         
-    def __processShot(self):
-        self.shot = self.__findShotNew()
-        self.altShot = self.__findShotNew(self.shot.datum.index + SHOT_SEPARATION)
-        if self.shot.confidence != ShotConfidence.NoShot and self.altShot.confidence != ShotConfidence.NoShot:
-            if self.altShot.datum.v.magnitude > self.shot.datum.v.magnitude:
-                self.shot.confidence = ShotConfidence.VeryLow
-        if self.shot.confidence == ShotConfidence.NoShot:
-            self.shot.datum = self.maxAccel
-        self.hiGShot = self.__findHiGShot()
+    def getLength(self, type: vector.Type) -> int:
+        if not self.__isLoaded(type) and type in self.__lengths:
+            return self.__lengths[type]
+        return len(self.__getStream(type))
+    
+    def getWindow(self, type: vector.Type, start: int, end: int) -> stream:
+        '''
+        Samples [start, end) of a stream, clipped to its length. A scanned
+        capture answers from the windows kept around its peaks and shots and
+        only loads the whole stream for a range outside them.
+        '''
+        start = max(start, 0)
+        end = min(end, self.getLength(type))
+        if not self.__isLoaded(type):
+            for first, window in self.__windows.get(type, []):
+                if first <= start and end <= first + len(window):
+                    return window[start - first:end - first]
+        return self.__getStream(type)[start:end]
+    
+    def getWindowAround(self, type: vector.Type, index: int, radius: int = WINDOW_RADIUS) -> window:
+        '''Samples index - radius to index + radius of a stream, clipped to its length.'''
+        start: int = max(index - radius, 0)
+        return window(self.getWindow(type, start, index + radius + 1), start, index)
+        
+    def findAllShots(self, separation: int = SHOT_SEPARATION) -> typing.List[shotDatum]:
+        shots: typing.List[shotDatum] = []
+        for i, confidence in detectAllShots(self.accel.magnitude, separation):
+            shots.append(shotDatum(vectorDatum(self.accel[i], i), confidence))
+        return shots
         
     def __findShot(self, offset: int = 0) -> shotDatum:
         __SHOT_THRESHOLD: int = 10000
@@ -303,45 +918,9 @@ class data:
         shot : shotDatum = shotDatum(vectorDatum(self.accel[shotIndex], shotIndex), shotConfidence)
         return shot
             
-    def __findShotNew(self, offset: int = 0) -> shotDatum:
-        DETECT_THRESHOLD : int = 22000
-        DETECT_PAIR_ADD_THRESHOLD : int = 29000
-        DETECT_PAIR_STRONG_THRESHOLD : int = 17000
-        shotConfidence : ShotConfidence = ShotConfidence.NoShot
-        shotIndex : int = 0
-        prevMagnitude : int = 0
-        if offset > 0 and offset < len(self.accel):
-            prevMagnitude = self.accel[offset - 1].magnitude
-        for i, v in enumerate(self.accel[offset:]):
-            index: int = offset + i
-            if v.magnitude >= 40000:
-                shotConfidence = ShotConfidence.VeryHigh
-                shotIndex = index
-                break
-            elif v.magnitude >= 35000:
-                shotConfidence = ShotConfidence.High
-                shotIndex = index
-                break
-            elif v.magnitude >= 30000:
-                shotConfidence = ShotConfidence.Medium
-                shotIndex = index
-                break
-            elif v.magnitude >= DETECT_THRESHOLD:
-                shotConfidence = ShotConfidence.Low
-                shotIndex = index
-                break
-            elif (prevMagnitude >= DETECT_PAIR_STRONG_THRESHOLD or v.magnitude >= DETECT_PAIR_STRONG_THRESHOLD) and (v.magnitude + prevMagnitude) >= DETECT_PAIR_ADD_THRESHOLD:
-                shotConfidence = ShotConfidence.VeryLow
-                shotIndex = index
-                break
-            prevMagnitude = v.magnitude
-        shot : shotDatum = shotDatum(vectorDatum(self.accel[shotIndex], shotIndex), shotConfidence)
-        return shot
-    
     def __findHiGShot(self, offset: int = 0) -> shotDatum:
-        KEY = 'magnitude'
-        v : vector = max(self.hiG, key = operator.attrgetter(KEY))
-        i : int = self.hiG.index(v)
+        i : int = self.maxHiG.index
+        v : vector = self.maxHiG.v
         confidence : ShotConfidence = ShotConfidence.NoShot
         if v.magnitude > 50:
             confidence = ShotConfidence.VeryHigh
@@ -357,41 +936,126 @@ class data:
         return datum
     
     def getAccelList(self, start : int = 0, end : int = -1) -> typing.List[typing.List[float]]:
-        l = []
         max = len(self.accel)
         if end < 0:
             end = max
         if end > max:
             end = max
             
-        for v in self.accel[start:end]:
-            l.append(v.list)
-        
-        return l
+        return self.accel[start:end].toList()
     
     def getGyroList(self, start : int = 0, end : int = -1) -> typing.List[typing.List[float]]:
-        l = []
         max = len(self.gyro)
         if end < 0:
             end = max
         if end > max:
             end = max
             
-        for v in self.gyro[start:end]:
-            l.append(v.list)
-        
-        return l
+        return self.gyro[start:end].toList()
     
     def getHiGList(self, start : int = 0, end : int = -1) -> typing.List[typing.List[float]]:
-        l = []
         max = len(self.hiG)
         if end < 0:
             end = max
         if end > max:
             end = max
             
-        for v in self.hiG[start:end]:
-            l.append(v.list)
-        
-        return l
+        return self.hiG[start:end].toList()
+    
+    
+    def toArrays(self) -> typing.Dict[str, np.ndarray]:
+        peaks: typing.List[vectorDatum] = [self.maxGyro, self.maxAccel, self.maxHiG, self.maxAccelX, self.maxAccelY, self.maxAccelZ]
+        shots: typing.List[shotDatum] = [self.shot, self.altShot, self.hiGShot]
+        return {
+            'gyro': self.gyro.values,
+            'accel': self.accel.values,
+            'hiG': self.hiG.values,
+            'calibration': np.array(self.calibration.list, dtype = np.float64),
+            'handedness': np.array(self.handedness.value),
+            'peaks': np.array([p.index for p in peaks], dtype = np.int64),
+            'shots': np.array([[s.datum.index, s.confidence.value] for s in shots], dtype = np.int64),
+        }
+    
+    def scan(fileName: str, chunkRows: int = DEFAULT_CHUNK_ROWS, separation: int = SHOT_SEPARATION) -> 'data':
+        '''
+        Analyzes a capture in blocks of chunkRows rows, so memory is bounded
+        by the block size rather than the file size. A first pass finds every
+        peak and shot; a second keeps WINDOW_RADIUS samples around each of
+        them, which is all the summary needs. Touching a whole stream still
+        loads it from the file.
+        '''
+        d: data = data(fileName)
+        s: scanner = scanner(separation)
+        for c in capture.readChunks(d.filePath, chunkRows):
+            s.add(c)
+        for name in scanner.PEAKS:
+            if name not in s.peaks:
+                raise ValueError('{0}: no samples for {1}'.format(d.filePath, name))
+        d.__setSettings(s.calibration, s.handedness)
+        d.__lengths = dict(s.lengths)
+        d.__windows = data.__collectWindows(d.filePath, chunkRows, s)
+        d.__maxGyro = d.__getDatum(vector.Type.Gyro, s.peaks['maxGyro'])
+        d.__maxAccel = d.__getDatum(vector.Type.Accel, s.peaks['maxAccel'])
+        d.__maxHiG = d.__getDatum(vector.Type.HiG, s.peaks['maxHiG'])
+        d.__maxAccelX = d.__getDatum(vector.Type.Accel, s.peaks['maxAccelX'])
+        d.__maxAccelY = d.__getDatum(vector.Type.Accel, s.peaks['maxAccelY'])
+        d.__maxAccelZ = d.__getDatum(vector.Type.Accel, s.peaks['maxAccelZ'])
+        d.__resolveShots([shotDatum(d.__getDatum(vector.Type.Accel, i), confidence) for i, confidence in s.shots])
+        return d
+    
+    def __getDatum(self, type: vector.Type, i: int) -> vectorDatum:
+        return vectorDatum(self.getWindow(type, i, i + 1)[0], i)
+    
+    def __collectWindows(filePath: str, chunkRows: int, s: scanner) -> typing.Dict[vector.Type, typing.List[typing.Tuple[int, stream]]]:
+        windows: typing.Dict[vector.Type, typing.List[typing.Tuple[int, stream]]] = {}
+        ranges: typing.Dict[vector.Type, typing.List[typing.List[int]]] = {}
+        for type, length in s.lengths.items():
+            # Merge overlapping windows so every sample is kept once.
+            merged: typing.List[typing.List[int]] = []
+            for i in s.getIndices(type):
+                start: int = max(i - WINDOW_RADIUS, 0)
+                end: int = min(i + WINDOW_RADIUS + 1, length)
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            ranges[type] = merged
+        # Blocks are only parsed again when a window overlaps them.
+        wanted: typing.List[int] = []
+        for i, offsets in enumerate(s.blocks):
+            ends: typing.Dict[vector.Type, int] = s.blocks[i + 1] if i + 1 < len(s.blocks) else s.lengths
+            if any(start < ends[t] and end > offsets[t] for t in ranges for start, end in ranges[t]):
+                wanted.append(i)
+        parts: typing.Dict[vector.Type, typing.List[typing.List[np.ndarray]]] = {t: [[] for r in ranges[t]] for t in ranges}
+        for i, c in zip(wanted, capture.readChunks(filePath, chunkRows, set(wanted))):
+            for type, values in ((vector.Type.Gyro, c.gyro), (vector.Type.Accel, c.accel), (vector.Type.HiG, c.hiG)):
+                offset: int = s.blocks[i][type]
+                for (start, end), part in zip(ranges[type], parts[type]):
+                    if start < offset + len(values) and end > offset:
+                        part.append(np.array(values[max(start - offset, 0):end - offset]))
+        for type in ranges:
+            windows[type] = [(start, stream(packSamples(np.concatenate(part)), type)) for (start, end), part in zip(ranges[type], parts[type])]
+        return windows
     
+    def fromArrays(fileName: str, arrays: typing.Mapping[str, np.ndarray]) -> 'data':
+        d: data = data('')
+        d.fileName = os.path.basename(fileName)
+        d.filePath = os.path.join(os.getcwd(), fileName)
+        d.name = d.fileName.replace('.csv', '').replace(CAPTURE_EXTENSION, '')
+        d.__gyro = stream(arrays['gyro'], vector.Type.Gyro)
+        d.__accel = stream(arrays['accel'], vector.Type.Accel)
+        d.__hiG = stream(arrays['hiG'], vector.Type.HiG)
+        d.__calibration = vector(arrays['calibration'].tolist(), vector.Type.Calibration)
+        d.__handedness = Handedness(int(arrays['handedness']))
+        peaks: typing.List[int] = [int(i) for i in arrays['peaks']]
+        d.__maxGyro = vectorDatum(d.gyro[peaks[0]], peaks[0])
+        d.__maxAccel = vectorDatum(d.accel[peaks[1]], peaks[1])
+        d.__maxHiG = vectorDatum(d.hiG[peaks[2]], peaks[2])
+        d.__maxAccelX = vectorDatum(d.accel[peaks[3]], peaks[3])
+        d.__maxAccelY = vectorDatum(d.accel[peaks[4]], peaks[4])
+        d.__maxAccelZ = vectorDatum(d.accel[peaks[5]], peaks[5])
+        shots: typing.List[typing.List[int]] = arrays['shots'].tolist()
+        d.__shot = shotDatum(vectorDatum(d.accel[shots[0][0]], shots[0][0]), ShotConfidence(shots[0][1]))
+        d.__altShot = shotDatum(vectorDatum(d.accel[shots[1][0]], shots[1][0]), ShotConfidence(shots[1][1]))
+        d.__hiGShot = shotDatum(vectorDatum(d.hiG[shots[2][0]], shots[2][0]), ShotConfidence(shots[2][1]))
+        return d
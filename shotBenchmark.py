@@ -0,0 +1,419 @@
+# === IMPORTS ==================================================================
+
+import argparse
+import json
+import numpy as np
+import operator
+import os
+import platform
+import shot
+import shotOutput
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+
+# === GLOBAL CONSTANTS =========================================================
+
+DEFAULT_SAMPLES = 1000000
+DEFAULT_REPEAT = 3
+DEFAULT_SHEET_SAMPLES = 100000
+DEFAULT_FILES = 8
+DEFAULT_FILE_SAMPLES = 50000
+DEFAULT_SHOTS = 3
+
+# Shot profile of the generated captures: a Gaussian pulse of SHOT_WIDTH
+# samples on every stream, peaking at these magnitudes in LSB.
+SHOT_ACCEL_PEAK = 45000
+SHOT_GYRO_PEAK = 20000
+SHOT_HI_G_PEAK = 120
+SHOT_WIDTH = 4.0
+
+BENCHMARKS = ('stages', 'analyze', 'detect', 'hig-comp', 'xlsx-data')
+STAGES = ('parse', 'analyze', 'processShot', 'xlsx.writeShotData', 'xlsxData.addData', 'xlsxAllData.addData', 'finalize')
+
+
+# === FUNCTIONS ================================================================
+
+def __addPulse(values : np.ndarray, center : int, peak : float, width : float, direction : np.ndarray, limits : typing.Tuple[int, int]):
+    start : int = max(center - int(4 * width), 0)
+    end : int = min(center + int(4 * width) + 1, len(values))
+    t : np.ndarray = np.arange(start, end)
+    pulse : np.ndarray = peak * np.exp(-0.5 * ((t - center) / width) ** 2)
+    values[start:end] = np.clip(values[start:end] + np.outer(pulse, direction), *limits).astype(values.dtype)
+
+def generateCapture(filePath : str, samples : int, seed : int = 0, shots : int = 0, packed : float = 0.0, handedness : shot.Handedness = shot.Handedness.Right):
+    '''
+    Writes a synthetic capture of samples gyro, accel and hiG rows with shots
+    evenly spaced pulses. A fraction packed of the hiG samples is written as
+    type-7 rows, two samples per row.
+    '''
+    rng : np.random.Generator = np.random.default_rng(seed)
+    gyro : np.ndarray = rng.integers(-3000, 3000, (samples, 3))
+    accel : np.ndarray = rng.integers(-3000, 3000, (samples, 3))
+    hiG : np.ndarray = rng.integers(-100, 100, (samples, 3))
+    for center in np.linspace(0, samples, shots + 2)[1:-1].astype(int):
+        direction : np.ndarray = rng.normal(size = 3)
+        direction /= np.linalg.norm(direction)
+        __addPulse(gyro, center, SHOT_GYRO_PEAK, SHOT_WIDTH, direction, (-32768, 32767))
+        __addPulse(accel, center, SHOT_ACCEL_PEAK, SHOT_WIDTH, direction, (-32768, 32767))
+        __addPulse(hiG, center, SHOT_HI_G_PEAK, SHOT_WIDTH, direction, (-128, 127))
+    # A packed row carries the hiG samples i and i + 1 and is written where
+    # the second of them would have been.
+    pairs : np.ndarray = np.flatnonzero(rng.random(samples // 2) < packed) * 2
+    single : np.ndarray = np.ones(samples, dtype = bool)
+    single[pairs] = False
+    single[pairs + 1] = False
+    words : np.ndarray = np.ascontiguousarray(np.hstack((hiG[pairs], hiG[pairs + 1])).astype(np.int8)).view('<i2')
+    rows : typing.List[typing.Tuple[np.ndarray, int, int, np.ndarray]] = [
+        (np.arange(samples), 0, shot.TYPE_IMU_GRYO, gyro),
+        (np.arange(samples), 1, shot.TYPE_IMU_ACCEL, accel),
+        (np.flatnonzero(single), 2, shot.TYPE_HI_G_ACCEL, hiG[single]),
+        (pairs + 1, 2, shot.TYPE_HI_G_ACCEL_COMP, words),
+        ]
+    sample : np.ndarray = np.concatenate([r[0] for r in rows])
+    order : np.ndarray = np.concatenate([np.full(len(r[0]), r[1]) for r in rows])
+    table : np.ndarray = np.zeros((len(sample), shot.capture.NUM_LINE_INDICES), dtype = np.int64)
+    table[:, 0] = np.concatenate([np.full(len(r[0]), r[2]) for r in rows])
+    table[:, 1:] = np.concatenate([r[3] for r in rows])
+    table = table[np.lexsort((order, sample))]
+    with open(filePath, 'w') as file:
+        np.savetxt(file, table, fmt = '%d', delimiter = ', ')
+        file.write('{0}, {1}, {2}, {3}\n'.format(shot.TYPE_CALIBRATION, -0.280273, -0.979248, -0.011719))
+        file.write('{0}, {1}, {2}, {3}\n'.format(shot.TYPE_SETTINGS, handedness.value, 0, 0))
+
+def __time(function : typing.Callable[[], typing.Any], repeat : int) -> float:
+    best : float = float('inf')
+    for i in range(repeat):
+        start : float = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+class __sample:
+    def __init__(self, v : typing.List[float], magnitude : float):
+        self.magnitude : float = magnitude
+        self.absX : float = abs(v[0])
+        self.absY : float = abs(v[1])
+        self.absZ : float = abs(v[2])
+
+def __scalarAnalyze(gyro : list, accel : list, hiG : list) -> typing.List[int]:
+    # Reference for the per-attribute max() followed by list.index() scans.
+    indices : typing.List[int] = []
+    for samples, key in ((gyro, 'magnitude'), (accel, 'magnitude'), (hiG, 'magnitude'), (accel, 'absX'), (accel, 'absY'), (accel, 'absZ')):
+        v = max(samples, key = operator.attrgetter(key))
+        indices.append(samples.index(v))
+    return indices
+
+def __scalarDetectShot(magnitude : typing.List[float], offset : int = 0) -> typing.Tuple[int, shot.ShotConfidence]:
+    # Reference for the sample-by-sample threshold cascade.
+    prevMagnitude : float = 0
+    if offset > 0 and offset < len(magnitude):
+        prevMagnitude = magnitude[offset - 1]
+    for i, m in enumerate(magnitude[offset:]):
+        index : int = offset + i
+        if m >= shot.DETECT_VERY_HIGH_THRESHOLD:
+            return index, shot.ShotConfidence.VeryHigh
+        elif m >= shot.DETECT_HIGH_THRESHOLD:
+            return index, shot.ShotConfidence.High
+        elif m >= shot.DETECT_MEDIUM_THRESHOLD:
+            return index, shot.ShotConfidence.Medium
+        elif m >= shot.DETECT_THRESHOLD:
+            return index, shot.ShotConfidence.Low
+        elif (prevMagnitude >= shot.DETECT_PAIR_STRONG_THRESHOLD or m >= shot.DETECT_PAIR_STRONG_THRESHOLD) and (m + prevMagnitude) >= shot.DETECT_PAIR_ADD_THRESHOLD:
+            return index, shot.ShotConfidence.VeryLow
+        prevMagnitude = m
+    return 0, shot.ShotConfidence.NoShot
+
+def __toSamples(s : shot.stream) -> list:
+    return [__sample(v, m) for v, m in zip(s.toList(), s.magnitude.tolist())]
+
+def benchmarkAnalyze(samples : int = DEFAULT_SAMPLES, repeat : int = DEFAULT_REPEAT):
+    with tempfile.TemporaryDirectory() as folder:
+        filePath : str = os.path.join(folder, 'benchmark.csv')
+        generateCapture(filePath, samples)
+        d : shot.data = shot.data(filePath).evaluate()
+    gyro : list = __toSamples(d.gyro)
+    accel : list = __toSamples(d.accel)
+    hiG : list = __toSamples(d.hiG)
+    analyze : typing.Callable[[], None] = getattr(d, '_data__analyze')
+    scalar : float = __time(lambda: __scalarAnalyze(gyro, accel, hiG), repeat)
+    fused : float = __time(analyze, repeat)
+    expected : typing.List[int] = __scalarAnalyze(gyro, accel, hiG)
+    actual : typing.List[int] = [d.maxGyro.index, d.maxAccel.index, d.maxHiG.index, d.maxAccelX.index, d.maxAccelY.index, d.maxAccelZ.index]
+    print('analyze: {0} samples'.format(samples))
+    print('  scalar : {0:.4f} s'.format(scalar))
+    print('  fused  : {0:.4f} s'.format(fused))
+    print('  speedup: {0:.1f}x'.format(scalar / fused))
+    if expected != actual:
+        raise AssertionError('analyze mismatch: {0} != {1}'.format(actual, expected))
+    print('  match  : True')
+
+def verifyDetect(trials : int = 2000, seed : int = 0) -> bool:
+    '''
+    Raises AssertionError unless detectShot matches the scalar cascade at
+    every offset and detectAllShots matches rescanning from each shot, on
+    random magnitudes quantized around the thresholds.
+    '''
+    rng : np.random.Generator = np.random.default_rng(seed)
+    for i in range(trials):
+        length : int = int(rng.integers(0, 200))
+        # Quantize around the thresholds so ties and pair-rule edges come up.
+        magnitude : np.ndarray = rng.integers(0, 45, length) * 1000.0
+        magnitude[rng.random(length) < 0.1] += 500.0
+        offsets : typing.List[int] = [0, 1, length - 1, length, length + 5, int(rng.integers(0, length + 1))]
+        for offset in offsets:
+            if offset < 0:
+                continue
+            if shot.detectShot(magnitude, offset) != __scalarDetectShot(magnitude.tolist(), offset):
+                raise AssertionError('detect mismatch: trial {0}, offset {1}'.format(i, offset))
+        if shot.detectAllShots(magnitude) != __chainedDetectShots(magnitude):
+            raise AssertionError('detect all mismatch: trial {0}'.format(i))
+    return True
+
+def __chainedDetectShots(magnitude : np.ndarray) -> typing.List[typing.Tuple[int, shot.ShotConfidence]]:
+    # Reference for rescanning from each shot plus SHOT_SEPARATION.
+    shots : typing.List[typing.Tuple[int, shot.ShotConfidence]] = []
+    offset : int = 0
+    while True:
+        index, confidence = shot.detectShot(magnitude, offset)
+        if confidence is shot.ShotConfidence.NoShot:
+            return shots
+        shots.append((index, confidence))
+        offset = index + shot.SHOT_SEPARATION
+
+def benchmarkDetect(samples : int = DEFAULT_SAMPLES, repeat : int = DEFAULT_REPEAT):
+    rng : np.random.Generator = np.random.default_rng(0)
+    # A quiet signal with the shot at the very end is the scalar worst case.
+    magnitude : np.ndarray = rng.uniform(0, 16000, samples)
+    magnitude[-1] = shot.DETECT_VERY_HIGH_THRESHOLD
+    values : typing.List[float] = magnitude.tolist()
+    scalar : float = __time(lambda: __scalarDetectShot(values), repeat)
+    vectorized : float = __time(lambda: shot.detectShot(magnitude), repeat)
+    print('detect: {0} samples'.format(samples))
+    print('  scalar    : {0:.4f} s'.format(scalar))
+    print('  vectorized: {0:.4f} s'.format(vectorized))
+    print('  speedup   : {0:.1f}x'.format(scalar / vectorized))
+    verifyDetect()
+    if shot.detectShot(magnitude) != __scalarDetectShot(values):
+        raise AssertionError('detect mismatch on the benchmark signal')
+    print('  match     : True')
+
+def __structDecodeHiGComp(xyz : np.ndarray) -> np.ndarray:
+    # Reference for the former int.to_bytes and struct.unpack per row decode
+    # and its per-value [HI_G_LOWER, HI_G_UPPER] limit.
+    FORMAT : str = '<2b'
+    ENDIANNESS : str = 'little'
+    d : typing.List[typing.List[float]] = []
+    for row in xyz:
+        x = struct.unpack(FORMAT, int(row[0]).to_bytes(2, ENDIANNESS, signed = True))
+        y = struct.unpack(FORMAT, int(row[1]).to_bytes(2, ENDIANNESS, signed = True))
+        z = struct.unpack(FORMAT, int(row[2]).to_bytes(2, ENDIANNESS, signed = True))
+        d.append([x[0], x[1], y[0]])
+        d.append([y[1], z[0], z[1]])
+    limit = lambda v: v if shot.capture.HI_G_LOWER <= v <= shot.capture.HI_G_UPPER else 0
+    return np.array([[limit(v) for v in sample] for sample in d], dtype = np.float64).reshape(-1, 3)
+
+def __decodeMatches(xyz : np.ndarray) -> bool:
+    expected : np.ndarray = __structDecodeHiGComp(xyz)
+    actual : np.ndarray = shot.capture.decodeHiGComp(xyz)
+    # Bit for bit, so a -0.0 or a changed dtype counts as a mismatch too.
+    return actual.dtype == expected.dtype and actual.shape == expected.shape and actual.tobytes() == expected.tobytes()
+
+def verifyHiGComp(trials : int = 200, rows : int = 500, seed : int = 0) -> bool:
+    '''
+    Raises AssertionError unless capture.decodeHiGComp matches the struct
+    reference on random words, the int16 edge values, words whose bytes sit
+    on the hiG limits and fractional values, and both reject words outside
+    int16.
+    '''
+    EDGES = [-32768, -1, 0, 127, 128, 255, 32767]
+    # Little-endian words with a byte on either side of each limit.
+    for low in (-128, -127, 0, 126, 127):
+        for high in (-128, -127, 0, 126, 127):
+            EDGES.append(int.from_bytes(struct.pack('<2b', low, high), 'little', signed = True))
+    edges : np.ndarray = np.array(EDGES, dtype = np.float64)
+    if not __decodeMatches(np.array(np.meshgrid(edges, edges, edges)).reshape(3, -1).T):
+        raise AssertionError('hiG comp decode mismatch on int16 edge values')
+    rng : np.random.Generator = np.random.default_rng(seed)
+    for i in range(trials):
+        xyz : np.ndarray = rng.integers(-32768, 32768, (rows, 3)).astype(np.float64)
+        if i % 2:
+            # The parser hands over floats, which both paths truncate.
+            xyz += rng.uniform(-0.99, 0.99, xyz.shape)
+            np.clip(xyz, -32768, 32767, out = xyz)
+        if not __decodeMatches(xyz):
+            raise AssertionError('hiG comp decode mismatch: trial {0}'.format(i))
+    for word in (-32769, 32768):
+        for decode in (shot.capture.decodeHiGComp, __structDecodeHiGComp):
+            try:
+                decode(np.array([[0, word, 0]], dtype = np.float64))
+            except OverflowError:
+                continue
+            raise AssertionError('hiG comp decode accepted {0}'.format(word))
+    return True
+
+def benchmarkHiGComp(samples : int = DEFAULT_SAMPLES, repeat : int = DEFAULT_REPEAT):
+    rng : np.random.Generator = np.random.default_rng(0)
+    # Every packed row holds two samples.
+    xyz : np.ndarray = rng.integers(-32768, 32768, (samples // 2, 3)).astype(np.float64)
+    scalar : float = __time(lambda: __structDecodeHiGComp(xyz), repeat)
+    vectorized : float = __time(lambda: shot.capture.decodeHiGComp(xyz), repeat)
+    print('hiG comp: {0} samples'.format(samples))
+    print('  struct    : {0:.4f} s'.format(scalar))
+    print('  vectorized: {0:.4f} s'.format(vectorized))
+    print('  speedup   : {0:.1f}x'.format(scalar / vectorized))
+    verifyHiGComp()
+    if not __decodeMatches(xyz):
+        raise AssertionError('hiG comp decode mismatch on the benchmark words')
+    print('  match     : True')
+
+def __perCellAddData(log : shotOutput.xlsxData, d : shot.data):
+    # Reference for the former one ws.write() per cell loop.
+    ws = log.wb.add_worksheet(d.fileName)
+    values : typing.List[typing.List[float]] = d.accel.toList()
+    magnitude : typing.List[float] = d.accel.magnitude.tolist()
+    for i, v in enumerate(values):
+        ws.write(shotOutput.xlsxData.Row.Data.value + i, shotOutput.xlsxData.Col.Index.value, i)
+        ws.write(shotOutput.xlsxData.Row.Data.value + i, shotOutput.xlsxData.Col.X.value, v[0])
+        ws.write(shotOutput.xlsxData.Row.Data.value + i, shotOutput.xlsxData.Col.Y.value, v[1])
+        ws.write(shotOutput.xlsxData.Row.Data.value + i, shotOutput.xlsxData.Col.Z.value, v[2])
+        ws.write(shotOutput.xlsxData.Row.Data.value + i, shotOutput.xlsxData.Col.Magnitude.value, magnitude[i])
+
+def __timeSheet(d : shot.data, folder : str, write : typing.Callable[[shotOutput.xlsxData, shot.data], None], decimation : int = 1) -> float:
+    log : shotOutput.xlsxData = shotOutput.xlsxData('benchmark', folder, shotOutput.xlsxData.DataType.Accel, decimation)
+    start : float = time.perf_counter()
+    write(log, d)
+    elapsed : float = time.perf_counter() - start
+    log.finalize()
+    return elapsed
+
+def benchmarkXlsxData(samples : int = DEFAULT_SHEET_SAMPLES, repeat : int = DEFAULT_REPEAT):
+    DECIMATION = 10
+    with tempfile.TemporaryDirectory() as folder:
+        filePath : str = os.path.join(folder, 'benchmark.csv')
+        generateCapture(filePath, samples)
+        d : shot.data = shot.data(filePath)
+        d.accel.magnitude
+        perCell : float = min(__timeSheet(d, folder, __perCellAddData) for i in range(repeat))
+        bulk : float = min(__timeSheet(d, folder, shotOutput.xlsxData.addData) for i in range(repeat))
+        decimated : float = min(__timeSheet(d, folder, shotOutput.xlsxData.addData, DECIMATION) for i in range(repeat))
+    print('xlsxData.addData: {0} samples'.format(samples))
+    print('  per-cell  : {0:.4f} s'.format(perCell))
+    print('  bulk      : {0:.4f} s ({1:.1f}x)'.format(bulk, perCell / bulk))
+    print('  bulk 1/{0} : {1:.4f} s ({2:.1f}x)'.format(DECIMATION, decimated, perCell / decimated))
+
+
+def __runStages(filePaths : typing.List[str], folder : str, measure : typing.Callable[[str, typing.Callable[[], typing.Any]], None]):
+    # The same steps bowTorqueAnalyzer runs per file, split at the stage
+    # boundaries of shot.data and the writers.
+    summary : shotOutput.xlsx = shotOutput.xlsx(shotOutput.xlsx.Mode.Abbreviated, os.path.join(folder, shotOutput.DEFAULT_FILE_NAME))
+    logs : typing.List[shotOutput.xlsxData] = [shotOutput.xlsxData(t.name, folder, t) for t in shotOutput.xlsxData.DataType]
+    allLog : shotOutput.xlsxAllData = shotOutput.xlsxAllData('all', folder)
+    for filePath in filePaths:
+        d : shot.data = shot.data(filePath)
+        measure('parse', lambda: (getattr(d, '_data__process')(), d.gyro, d.accel, d.hiG))
+        measure('analyze', getattr(d, '_data__analyze'))
+        measure('processShot', lambda: (getattr(d, '_data__processShot')(), d.hiGShot))
+        measure('xlsx.writeShotData', lambda: summary.writeShotData(d))
+        measure('xlsxData.addData', lambda: [l.addData(d) for l in logs])
+        measure('xlsxAllData.addData', lambda: allLog.addData(d))
+    measure('finalize', lambda: [w.finalize() for w in logs + [allLog, summary]])
+
+def __getThroughput(seconds : float, files : int, samples : int, peakBytes : int) -> typing.Dict[str, float]:
+    return {
+        'seconds': seconds,
+        'samplesPerSecond': files * samples / seconds if seconds > 0 else None,
+        'filesPerSecond': files / seconds if seconds > 0 else None,
+        'peakBytes': peakBytes,
+    }
+
+def benchmarkStages(files : int = DEFAULT_FILES, samples : int = DEFAULT_FILE_SAMPLES, shots : int = DEFAULT_SHOTS, packed : float = 0.5,
+                    repeat : int = DEFAULT_REPEAT) -> typing.Dict[str, typing.Any]:
+    '''
+    Times every stage over files generated captures of samples samples per
+    stream and returns the report. Times are the best of repeat runs; peak
+    memory is the largest traced allocation of one call of a stage, from a
+    separate run since tracing slows everything down.
+    '''
+    seconds : typing.Dict[str, float] = dict.fromkeys(STAGES, float('inf'))
+    peaks : typing.Dict[str, int] = dict.fromkeys(STAGES, 0)
+    with tempfile.TemporaryDirectory() as folder:
+        filePaths : typing.List[str] = []
+        for i in range(files):
+            filePaths.append(os.path.join(folder, 'capture{0:03d}.csv'.format(i)))
+            generateCapture(filePaths[-1], samples, i, shots, packed, shot.Handedness(i % shot.NUM_HANDEDNESS))
+        for i in range(repeat):
+            elapsed : typing.Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+            def measure(stage : str, function : typing.Callable[[], typing.Any]):
+                start : float = time.perf_counter()
+                function()
+                elapsed[stage] += time.perf_counter() - start
+            __runStages(filePaths, tempfile.mkdtemp(dir = folder), measure)
+            for stage in STAGES:
+                seconds[stage] = min(seconds[stage], elapsed[stage])
+        def trace(stage : str, function : typing.Callable[[], typing.Any]):
+            tracemalloc.reset_peak()
+            base : int = tracemalloc.get_traced_memory()[0]
+            function()
+            peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.start()
+        try:
+            __runStages(filePaths, tempfile.mkdtemp(dir = folder), trace)
+        finally:
+            tracemalloc.stop()
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'files': files,
+        'samplesPerFile': samples,
+        'shotsPerFile': shots,
+        'packed': packed,
+        'repeat': repeat,
+        'stages': {stage: __getThroughput(seconds[stage], files, samples, peaks[stage]) for stage in STAGES},
+        'total': __getThroughput(sum(seconds.values()), files, samples, max(peaks.values())),
+    }
+
+def printStages(report : typing.Dict[str, typing.Any]):
+    print('stages: {0} files x {1} samples'.format(report['files'], report['samplesPerFile']))
+    for stage, result in list(report['stages'].items()) + [('total', report['total'])]:
+        print('  {0:<20}: {1:8.4f} s {2:12.0f} samples/s {3:8.1f} files/s {4:8.1f} MB'.format(
+            stage, result['seconds'], result['samplesPerSecond'] or 0, result['filesPerSecond'] or 0, result['peakBytes'] / (1 << 20)))
+
+
+# === MAIN =====================================================================
+
+if __name__ == "__main__":
+    parser : argparse.ArgumentParser = argparse.ArgumentParser(description = 'Benchmark the shot analysis stages.')
+    parser.add_argument('--only', action = 'append', choices = BENCHMARKS, help = 'benchmark to run (repeatable, default: all)')
+    parser.add_argument('--samples', type = int, default = DEFAULT_SAMPLES, help = 'samples of the analyze and detect benchmarks')
+    parser.add_argument('--repeat', type = int, default = DEFAULT_REPEAT)
+    parser.add_argument('--sheet-samples', type = int, default = DEFAULT_SHEET_SAMPLES, help = 'samples of the xlsx-data benchmark')
+    parser.add_argument('--files', type = int, default = DEFAULT_FILES, help = 'captures of the stages benchmark')
+    parser.add_argument('--file-samples', type = int, default = DEFAULT_FILE_SAMPLES, help = 'samples per stream of each stages capture')
+    parser.add_argument('--shots', type = int, default = DEFAULT_SHOTS, help = 'shots per stages capture')
+    parser.add_argument('--packed', type = float, default = 0.5, help = 'fraction of hiG samples written as type-7 rows')
+    parser.add_argument('--json', metavar = 'PATH', help = "write the stages report as JSON ('-' for stdout, with --only stages)")
+    args : argparse.Namespace = parser.parse_args()
+    only : typing.Sequence[str] = args.only or BENCHMARKS
+    if 'stages' in only:
+        report : typing.Dict[str, typing.Any] = benchmarkStages(args.files, args.file_samples, args.shots, args.packed, args.repeat)
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent = 2)
+        else:
+            printStages(report)
+        if args.json and args.json != '-':
+            with open(args.json, 'w') as file:
+                json.dump(report, file, indent = 2)
+    if 'analyze' in only:
+        benchmarkAnalyze(args.samples, args.repeat)
+    if 'detect' in only:
+        benchmarkDetect(args.samples, args.repeat)
+    if 'hig-comp' in only:
+        benchmarkHiGComp(args.samples, args.repeat)
+    if 'xlsx-data' in only:
+        benchmarkXlsxData(args.sheet_samples, args.repeat)
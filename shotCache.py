@@ -0,0 +1,114 @@
+# === IMPORTS ==================================================================
+
+import hashlib
+import numpy as np
+import os
+import shot
+import tempfile
+import typing
+
+
+# === GLOBAL CONSTANTS =========================================================
+
+DEFAULT_FOLDER = '.shotCache'
+DEFAULT_MAX_BYTES = 1 << 30
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+# === CLASSES ==================================================================
+
+class cache:
+    '''
+    On-disk store of parsed streams and shot.data results, one .npz file per
+    capture keyed by the capture's content hash and shot.ANALYZER_VERSION.
+    Hits refresh the entry's modification time and evict() drops the least
+    recently used entries until the store fits in maxBytes.
+    '''
+    __EXTENSION : str = '.npz'
+
+    def __init__(self, folder : str = DEFAULT_FOLDER, maxBytes : int = DEFAULT_MAX_BYTES):
+        self.folder : str = folder
+        self.maxBytes : int = maxBytes
+        os.makedirs(self.folder, exist_ok = True)
+
+    def getKey(self, filePath : str) -> str:
+        h = hashlib.sha256()
+        with open(filePath, 'rb') as file:
+            for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+                h.update(block)
+        return '{0}-v{1}'.format(h.hexdigest(), shot.ANALYZER_VERSION)
+
+    def __getEntryPath(self, key : str) -> str:
+        return os.path.join(self.folder, key + self.__EXTENSION)
+
+    def __getEntries(self) -> typing.List[os.DirEntry]:
+        return [e for e in os.scandir(self.folder) if e.is_file() and e.name.endswith(self.__EXTENSION)]
+
+    def load(self, fileName : str, key : typing.Optional[str] = None) -> typing.Optional[shot.data]:
+        entryPath : str = self.__getEntryPath(key or self.getKey(fileName))
+        try:
+            with np.load(entryPath) as arrays:
+                d : shot.data = shot.data.fromArrays(fileName, arrays)
+            os.utime(entryPath)
+        except (OSError, KeyError, ValueError):
+            # Missing, evicted by another process or unreadable: recompute.
+            return None
+        return d
+
+    def store(self, d : shot.data, key : typing.Optional[str] = None):
+        entryPath : str = self.__getEntryPath(key or self.getKey(d.filePath))
+        # Write to a temporary file first so concurrent workers never see a
+        # partial entry.
+        handle, tempPath = tempfile.mkstemp(suffix = self.__EXTENSION, dir = self.folder)
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                np.savez(file, **d.toArrays())
+            os.replace(tempPath, entryPath)
+        except BaseException:
+            os.remove(tempPath)
+            raise
+
+    def get(self, fileName : str) -> shot.data:
+        key : str = self.getKey(fileName)
+        d : typing.Optional[shot.data] = self.load(fileName, key)
+        if d is None:
+            d = shot.data(fileName)
+            self.store(d, key)
+        return d
+
+    def evict(self) -> int:
+        entries : typing.List[os.DirEntry] = sorted(self.__getEntries(), key = lambda e: e.stat().st_mtime)
+        total : int = sum(e.stat().st_size for e in entries)
+        removed : int = 0
+        for e in entries:
+            if total <= self.maxBytes:
+                break
+            try:
+                total -= e.stat().st_size
+                os.remove(e.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def invalidate(self, fileNames : typing.Iterable[str]) -> int:
+        removed : int = 0
+        for fileName in fileNames:
+            try:
+                os.remove(self.__getEntryPath(self.getKey(fileName)))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self) -> int:
+        removed : int = 0
+        for e in self.__getEntries():
+            os.remove(e.path)
+            removed += 1
+        return removed
+
+    def getSize(self) -> typing.Tuple[int, int]:
+        entries : typing.List[os.DirEntry] = self.__getEntries()
+        return len(entries), sum(e.stat().st_size for e in entries)
@@ -0,0 +1,158 @@
+# === IMPORTS ==================================================================
+
+import os
+import shot
+import sqlite3
+import time
+import typing
+
+
+# === GLOBAL CONSTANTS =========================================================
+
+DEFAULT_FILE_NAME = 'shotIndex.db'
+CSV_EXTENSION = '.csv'
+
+# Columns of the shots table in order, with their SQLite types. Magnitudes are
+# in sensor units (g for accel and hiG, deg/s for gyro).
+COLUMNS = (
+    ('file', 'TEXT PRIMARY KEY'),
+    ('name', 'TEXT NOT NULL'),
+    ('captured', 'REAL'),
+    ('indexed', 'REAL NOT NULL'),
+    ('handedness', 'TEXT NOT NULL'),
+    ('samples', 'INTEGER NOT NULL'),
+    ('confidence', 'INTEGER NOT NULL'),
+    ('shotIndex', 'INTEGER NOT NULL'),
+    ('shot', 'REAL NOT NULL'),
+    ('altConfidence', 'INTEGER NOT NULL'),
+    ('altShotIndex', 'INTEGER NOT NULL'),
+    ('altShot', 'REAL NOT NULL'),
+    ('hiGConfidence', 'INTEGER NOT NULL'),
+    ('hiGShotIndex', 'INTEGER NOT NULL'),
+    ('hiG', 'REAL NOT NULL'),
+    ('maxAccel', 'REAL NOT NULL'),
+    ('maxGyro', 'REAL NOT NULL'),
+    ('maxHiG', 'REAL NOT NULL'),
+    )
+COLUMN_NAMES = tuple(c[0] for c in COLUMNS)
+
+# Composite indexes answer a filter on the leading column with a range over
+# hiG, and check the capture time, without reading the table; the leading
+# columns alone serve confidence- and handedness-only filters.
+INDEXES = (
+    ('confidence', 'hiG', 'captured'),
+    ('handedness', 'hiG'),
+    ('hiG',),
+    ('captured',),
+    ('name',),
+    )
+
+# Rows sampled per index by ANALYZE, which keeps it to milliseconds however
+# large the index grows.
+ANALYSIS_LIMIT = 1000
+
+
+# === CLASSES ==================================================================
+
+class index:
+    '''
+    Persistent SQLite index of per-capture shot results, one row per capture
+    keyed by its path, so a re-analyzed capture replaces its earlier row.
+    Rows added with addData() are committed by finalize(); query() answers
+    range and top-k queries from the indexes without touching the captures.
+    '''
+    def __init__(self, filePath : str = DEFAULT_FILE_NAME):
+        self.filePath : str = filePath
+        folder : str = os.path.dirname(filePath)
+        if folder:
+            os.makedirs(folder, exist_ok = True)
+        # Used by one thread at a time, but not always the one that opened it,
+        # e.g. the index stage of a pipeline.
+        self.connection : sqlite3.Connection = sqlite3.connect(filePath, check_same_thread = False)
+        self.connection.row_factory = sqlite3.Row
+        # WAL lets queries run while a run is still adding rows.
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS shots ({0})'.format(', '.join('{0} {1}'.format(n, t) for n, t in COLUMNS)))
+        for columns in INDEXES:
+            self.connection.execute('CREATE INDEX IF NOT EXISTS shots_{0} ON shots ({1})'.format('_'.join(columns), ', '.join(columns)))
+        self.connection.commit()
+        self.__insert : str = 'INSERT OR REPLACE INTO shots ({0}) VALUES ({1})'.format(', '.join(COLUMN_NAMES), ', '.join('?' * len(COLUMN_NAMES)))
+
+    def getRow(d : shot.data) -> typing.Tuple[typing.Any, ...]:
+        # Keyed by the resolved path, so 'cap.csv', './cap.csv' and a path
+        # through a symlink or '..' are one capture.
+        file : str = os.path.realpath(d.filePath) if d.filePath else d.fileName
+        captured : typing.Optional[float] = None
+        try:
+            captured = os.path.getmtime(d.filePath)
+        except OSError:
+            # Merged from a shard written on another node.
+            pass
+        # Scalar conversions of the cached raw magnitudes, so indexing never
+        # converts a whole stream.
+        return (file, d.name, captured, time.time(), d.handedness.name,
+                d.getLength(shot.vector.Type.Accel),
+                d.shot.confidence.value, d.shot.datum.index, shot.convertLsbToG(d.shot.datum.v.magnitude),
+                d.altShot.confidence.value, d.altShot.datum.index, shot.convertLsbToG(d.altShot.datum.v.magnitude),
+                d.hiGShot.confidence.value, d.hiGShot.datum.index, shot.convertLsbToHiG(d.hiGShot.datum.v.magnitude),
+                shot.convertLsbToG(d.maxAccel.v.magnitude), shot.convertLsbToDeg(d.maxGyro.v.magnitude), shot.convertLsbToHiG(d.maxHiG.v.magnitude))
+
+    def addData(self, d : shot.data):
+        row : typing.Tuple[typing.Any, ...] = index.getRow(d)
+        # A capture converted to binary in place replaces the row of its CSV
+        # original.
+        stem, extension = os.path.splitext(row[0])
+        if extension == shot.CAPTURE_EXTENSION:
+            self.connection.execute('DELETE FROM shots WHERE file = ?', (stem + CSV_EXTENSION,))
+        self.addRows([row])
+
+    def addRows(self, rows : typing.Iterable[typing.Tuple[typing.Any, ...]]):
+        self.connection.executemany(self.__insert, rows)
+
+    def finalize(self):
+        # Fresh statistics let the planner choose between the indexes.
+        self.connection.execute('PRAGMA analysis_limit = {0}'.format(ANALYSIS_LIMIT))
+        self.connection.execute('ANALYZE')
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def query(self, confidences : typing.Iterable[shot.ShotConfidence] = (), minConfidence : typing.Optional[shot.ShotConfidence] = None,
+              minHiG : typing.Optional[float] = None, maxHiG : typing.Optional[float] = None,
+              handedness : typing.Optional[shot.Handedness] = None, since : typing.Optional[float] = None, until : typing.Optional[float] = None,
+              name : typing.Optional[str] = None, orderBy : str = 'hiG', descending : bool = True, limit : typing.Optional[int] = None) -> typing.List[sqlite3.Row]:
+        '''
+        Rows matching every given filter: shot confidence in confidences or
+        at least minConfidence, hiG shot magnitude in [minHiG, maxHiG] g,
+        capture time in [since, until) seconds since the epoch and name
+        matching a glob pattern. Ordered by any column, limit gives top-k.
+        '''
+        if orderBy not in COLUMN_NAMES:
+            raise ValueError('unknown column {0}'.format(orderBy))
+        where : typing.List[str] = []
+        parameters : typing.List[typing.Any] = []
+        values : typing.List[int] = [c.value for c in confidences]
+        if values:
+            where.append('confidence IN ({0})'.format(', '.join('?' * len(values))))
+            parameters.extend(values)
+        for clause, value in (('confidence >= ?', minConfidence.value if minConfidence is not None else None),
+                              ('hiG >= ?', minHiG), ('hiG <= ?', maxHiG),
+                              ('handedness = ?', handedness.name if handedness is not None else None),
+                              ('captured >= ?', since), ('captured < ?', until),
+                              ('name GLOB ?', name)):
+            if value is not None:
+                where.append(clause)
+                parameters.append(value)
+        sql : str = 'SELECT * FROM shots'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY {0} {1}'.format(orderBy, 'DESC' if descending else 'ASC')
+        if limit is not None:
+            sql += ' LIMIT ?'
+            parameters.append(limit)
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def getCount(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM shots').fetchone()[0]
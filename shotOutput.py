@@ -1,14 +1,23 @@
 # === IMPORTS ==================================================================
 
+import csv
 import enum
 from io import FileIO
+import numpy as np
 import os
 from statistics import NormalDist
 import shot
 import string
+import time
 import typing
 import xlsxwriter
 
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
 
 # === GLOBAL CONSTANTS =========================================================
 
@@ -70,6 +79,24 @@ class AbbreviatedCol(enum.Enum):
     HiGShotRange = 1 + HiGShotConfidence + 1
 
 
+# === FUNCTIONS ================================================================
+
+def getSheetName(wb : xlsxwriter.Workbook, fileName : str) -> str:
+    '''
+    fileName, or fileName with a ' (n)' counter if wb already has a sheet of
+    that name, e.g. for captures of the same name in different folders.
+    '''
+    MAX_LENGTH = 31
+    used : typing.Set[str] = {ws.name.lower() for ws in wb.worksheets()}
+    name : str = fileName
+    n : int = 1
+    while name.lower() in used:
+        n += 1
+        suffix : str = ' ({0})'.format(n)
+        name = fileName[:MAX_LENGTH - len(suffix)] + suffix
+    return name
+
+
 # === CLASSES ==================================================================
 
 class xlsx:
@@ -112,6 +139,20 @@ class xlsx:
     )
     __ROW_FORMULAS_LENGTH = len(__ROW_FORMULAS)
     
+    # Streaming sheets write their statistics before the data, so the last
+    # data row is left to a sheet-level name that is defined on finalize().
+    __DATA_END_NAME = 'DataEnd'
+    __STREAMING_ROW_FORMULAS : typing.List[str] = (
+        '',
+        '{{=MIN({0}${1}:INDEX({0}:{0},{2}))}}',
+        '{{=MAX({0}${1}:INDEX({0}:{0},{2}))}}',
+        '{{=AVERAGE({0}${1}:INDEX({0}:{0},{2}))}}',
+        '{{=MIN(ABS({0}${1}:INDEX({0}:{0},{2})))}}',
+        '{{=MAX(ABS({0}${1}:INDEX({0}:{0},{2})))}}',
+        '{{=AVERAGE(ABS({0}${1}:INDEX({0}:{0},{2})))}}',
+        '',
+    )
+    
     __HEADER_LABELS : typing.List[str] = (
         '',
         'Samples',
@@ -271,10 +312,14 @@ class xlsx:
             self.row : int = 0
             self.ws: xlsxwriter.Workbook.worksheet_class = ws
         
-    def __init__(self, mode : Mode = Mode.Normal, fileName: str = DEFAULT_FILE_NAME, sheetNames: typing.List[str] = __DEFAULT_SHEET_NAMES):
+    def __init__(self, mode : Mode = Mode.Normal, fileName: str = DEFAULT_FILE_NAME, sheetNames: typing.List[str] = __DEFAULT_SHEET_NAMES, streaming : bool = False):
         self.mode : self.Mode = mode
         self.fileName: str = str(fileName)
-        self.wb: xlsxwriter.Workbook = xlsxwriter.Workbook(self.fileName + self.__EXTENSION)
+        # Streaming mode flushes every finished row to disk, so memory stays
+        # flat however many shots are written, at the cost of strictly
+        # in-order rows per sheet.
+        self.streaming : bool = streaming
+        self.wb: xlsxwriter.Workbook = xlsxwriter.Workbook(self.fileName + self.__EXTENSION, {'constant_memory': self.streaming})
         self.rankedSheets: typing.List[self.sheet] = []
         self.allSheet: self.sheet = self.sheet(self.__ALL_SHEET, self.wb.add_worksheet(self.__ALL_SHEET))
         self.__initSheet(self.allSheet)
@@ -284,67 +329,86 @@ class xlsx:
             self.rankedSheets.append(s)
 
     def __initSheet(self, s : sheet):
-        labels : typing.List[str] = self.__HEADER_LABELS
-        if self.mode is self.Mode.Abbreviated:
-            labels = self.__ABBREVIATED_HEADER_LABELS
-        for i, field in enumerate(labels):
-            s.ws.write(Row.Header.value, i, field)
-            s.ws.write(Row.HeaderRepeat.value, i, field)
-        for i, field in enumerate(self.__ROW_LABELS):
-            s.ws.write(i, Col.Name.value, self.__ROW_LABELS[i])
         # Set the column width.
         s.ws.set_column(Row.Header.value, Row.Header.value, self.__DEFAULT_COLUMN_WIDTH)
         # Freeze the header rows and columns.
         s.ws.freeze_panes(Row.Data.value, Col.Samples.value)
+        # Streaming sheets write their header with the first data row.
+        s.row = Row.Header.value
+        if not self.streaming:
+            self.__writeHeader(s)
+            
+    def __writeHeader(self, s : sheet, statistics : bool = False):
+        labels : typing.List[str] = xlsx.getHeaderLabels(self.mode)
+        s.ws.write_row(Row.Header.value, Col.Name.value, labels)
+        s.ws.write(Row.Header.value, Col.Name.value, self.__ROW_LABELS[Row.Header.value])
+        for j in range(Row.Min.value, Row.HeaderRepeat.value):
+            s.ws.write(j, Col.Name.value, self.__ROW_LABELS[j])
+            if statistics:
+                self.__writeStatisticsRow(s, j, self.__STREAMING_ROW_FORMULAS, self.__DATA_END_NAME)
+        s.ws.write_row(Row.HeaderRepeat.value, Col.Name.value, labels)
+        s.ws.write(Row.HeaderRepeat.value, Col.Name.value, self.__ROW_LABELS[Row.HeaderRepeat.value])
         s.row = Row.Data.value
             
-    def __writeVectorDatum(self, ws : xlsxwriter.Workbook.worksheet_class, row : int, col :int, datum : shot.vectorDatum) -> int:
-        ws.write(row, col + VectorOffset.Magnitude.value, datum.v.magnitude)
-        ws.write(row, col + VectorOffset.Index.value, datum.index)
-        ws.write(row, col + VectorOffset.X.value, datum.v.x)
-        ws.write(row, col + VectorOffset.Y.value, datum.v.y)
-        ws.write(row, col + VectorOffset.Z.value, datum.v.z)
+    def __setVectorDatum(row : typing.Dict[int, typing.Any], col : int, datum : shot.vectorDatum) -> int:
+        row[col + VectorOffset.Magnitude.value] = datum.v.magnitude
+        row[col + VectorOffset.Index.value] = datum.index
+        row[col + VectorOffset.X.value] = datum.v.x
+        row[col + VectorOffset.Y.value] = datum.v.y
+        row[col + VectorOffset.Z.value] = datum.v.z
         return col + VECTOR_OFFSET_LENGTH
     
-    def __writeRange(self, ws : xlsxwriter.Workbook.worksheet_class, row : int, col :int, accel : typing.List[shot.vector], index : int) -> int:
-        samples = len(accel)
+    def __setRange(row : typing.Dict[int, typing.Any], col : int, data : shot.data, index : int) -> int:
+        accel : shot.window = data.getWindowAround(shot.vector.Type.Accel, index, RANGE[-1])
         for i, j in enumerate(RANGE):
-            j += index
-            if (j >= 0) and (j < samples):
-                ws.write(row, col + i, accel[j].magnitude)
+            j += accel.offset
+            if (j >= 0) and (j < len(accel)):
+                row[col + i] = float(accel.stream.magnitude[j])
         return col + RANGE_LENGTH
     
-    def __writeShotData(self, s : sheet, data : shot.data):
-        row: int = s.row
-        ws : xlsxwriter.Workbook.worksheet_class = s.ws
-        if self.mode is self.Mode.Normal:
-            ws.write(row, Col.Name.value, data.name)
-            ws.write(row, Col.Samples.value, len(data.accel))
-            self.__writeVectorDatum(ws, row, Col.V.value, data.maxAccel)
-            self.__writeRange(ws, row, Col.VRange.value, data.accel, data.maxAccel.index)
-            self.__writeVectorDatum(ws, row, Col.X.value, data.maxAccelX)
-            self.__writeVectorDatum(ws, row, Col.Y.value, data.maxAccelY)
-            self.__writeVectorDatum(ws, row, Col.Z.value, data.maxAccelZ)
-            self.__writeVectorDatum(ws, row, Col.Shot.value, data.shot.datum)
-            ws.write(row, Col.ShotConfidence.value, data.shot.confidence.value)
-            self.__writeRange(ws, row, Col.ShotRange.value, data.accel, data.shot.datum.index)
-            self.__writeVectorDatum(ws, row, Col.AltShot.value, data.altShot.datum)
-            ws.write(row, Col.AltShotConfidence.value, data.altShot.confidence.value)
-            self.__writeRange(ws, row, Col.AltShotRange.value, data.accel, data.altShot.datum.index)
-            self.__writeVectorDatum(ws, row, Col.HiGShot.value, data.hiGShot.datum)
-            ws.write(row, Col.HiGShotConfidence.value, data.hiGShot.confidence.value)
-            self.__writeRange(ws, row, Col.HiGShotRange.value, data.accel, data.hiGShot.datum.index)
-        elif self.mode is self.Mode.Abbreviated:
-            ws.write(row, AbbreviatedCol.Name.value, data.name)
-            ws.write(row, AbbreviatedCol.Samples.value, len(data.accel))
-            self.__writeVectorDatum(ws, row, AbbreviatedCol.V.value, data.maxAccel)
-            self.__writeRange(ws, row, AbbreviatedCol.VRange.value, data.accel, data.maxAccel.index)
-            self.__writeVectorDatum(ws, row, AbbreviatedCol.Shot.value, data.shot.datum)
-            ws.write(row, AbbreviatedCol.ShotConfidence.value, data.shot.confidence.value)
-            self.__writeRange(ws, row, AbbreviatedCol.ShotRange.value, data.accel, data.shot.datum.index)
-            self.__writeVectorDatum(ws, row, Col.HiGShot.value, data.hiGShot.datum)
-            ws.write(row, Col.HiGShotConfidence.value, data.hiGShot.confidence.value)
-            self.__writeRange(ws, row, Col.HiGShotRange.value, data.accel, data.hiGShot.datum.index)
+    def getShotRow(data : shot.data, mode : 'xlsx.Mode') -> typing.List[typing.Any]:
+        # Cells are set in the historical write order; where column ranges
+        # overlap the later value wins, as it did with per-cell writes.
+        row : typing.Dict[int, typing.Any] = {}
+        if mode is xlsx.Mode.Normal:
+            row[Col.Name.value] = data.name
+            row[Col.Samples.value] = data.getLength(shot.vector.Type.Accel)
+            xlsx.__setVectorDatum(row, Col.V.value, data.maxAccel)
+            xlsx.__setRange(row, Col.VRange.value, data, data.maxAccel.index)
+            xlsx.__setVectorDatum(row, Col.X.value, data.maxAccelX)
+            xlsx.__setVectorDatum(row, Col.Y.value, data.maxAccelY)
+            xlsx.__setVectorDatum(row, Col.Z.value, data.maxAccelZ)
+            xlsx.__setVectorDatum(row, Col.Shot.value, data.shot.datum)
+            row[Col.ShotConfidence.value] = data.shot.confidence.value
+            xlsx.__setRange(row, Col.ShotRange.value, data, data.shot.datum.index)
+            xlsx.__setVectorDatum(row, Col.AltShot.value, data.altShot.datum)
+            row[Col.AltShotConfidence.value] = data.altShot.confidence.value
+            xlsx.__setRange(row, Col.AltShotRange.value, data, data.altShot.datum.index)
+            xlsx.__setVectorDatum(row, Col.HiGShot.value, data.hiGShot.datum)
+            row[Col.HiGShotConfidence.value] = data.hiGShot.confidence.value
+            xlsx.__setRange(row, Col.HiGShotRange.value, data, data.hiGShot.datum.index)
+        elif mode is xlsx.Mode.Abbreviated:
+            row[AbbreviatedCol.Name.value] = data.name
+            row[AbbreviatedCol.Samples.value] = data.getLength(shot.vector.Type.Accel)
+            xlsx.__setVectorDatum(row, AbbreviatedCol.V.value, data.maxAccel)
+            xlsx.__setRange(row, AbbreviatedCol.VRange.value, data, data.maxAccel.index)
+            xlsx.__setVectorDatum(row, AbbreviatedCol.Shot.value, data.shot.datum)
+            row[AbbreviatedCol.ShotConfidence.value] = data.shot.confidence.value
+            xlsx.__setRange(row, AbbreviatedCol.ShotRange.value, data, data.shot.datum.index)
+            xlsx.__setVectorDatum(row, Col.HiGShot.value, data.hiGShot.datum)
+            row[Col.HiGShotConfidence.value] = data.hiGShot.confidence.value
+            xlsx.__setRange(row, Col.HiGShotRange.value, data, data.hiGShot.datum.index)
+        return [row.get(i) for i in range(max(row) + 1)]
+    
+    def getHeaderLabels(mode : 'xlsx.Mode') -> typing.List[str]:
+        if mode is xlsx.Mode.Abbreviated:
+            return list(xlsx.__ABBREVIATED_HEADER_LABELS)
+        return list(xlsx.__HEADER_LABELS)
+    
+    def __writeShotRow(self, s : sheet, row : typing.List[typing.Any]):
+        if s.row < Row.Data.value:
+            self.__writeHeader(s, True)
+        s.ws.write_row(s.row, Col.Name.value, row)
         s.row += 1
         
     def __getXlsxColStr(self, col : int) -> str:
@@ -359,21 +423,29 @@ class xlsx:
         postChar : str = string.ascii_uppercase[post]
         return preChar + postChar
     
+    def __writeStatisticsRow(self, s : sheet, j : int, formulas : typing.List[str], end : typing.Any):
+        for i, field in enumerate(xlsx.getHeaderLabels(self.mode)):
+            if field:
+                colStr : str = self.__getXlsxColStr(i)
+                s.ws.write_array_formula(j, i, j, i, formulas[j].format(colStr, self.__DATA_ROW_START, end))
+    
     def __writeStatistics(self, s : sheet):
-        if s.row > Row.Data.value:
-            labels : typing.List[str] = self.__HEADER_LABELS
-            if self.mode is self.Mode.Abbreviated:
-                labels = self.__ABBREVIATED_HEADER_LABELS
-            for i, field in enumerate(labels):
-                if field:
-                    for j in range(Row.Min.value, Row.HeaderRepeat.value):
-                        colStr : str = self.__getXlsxColStr(i)
-                        s.ws.write_array_formula(j, i, j, i, self.__ROW_FORMULAS[j].format(colStr, self.__DATA_ROW_START, s.row))
+        if self.streaming:
+            if s.row < Row.Data.value:
+                self.__writeHeader(s)
+            else:
+                self.wb.define_name("'{0}'!{1}".format(s.name, self.__DATA_END_NAME), '={0}'.format(s.row))
+        elif s.row > Row.Data.value:
+            for j in range(Row.Min.value, Row.HeaderRepeat.value):
+                self.__writeStatisticsRow(s, j, self.__ROW_FORMULAS, s.row)
  
     
+    def writeShotRow(self, row : typing.List[typing.Any], confidence : shot.ShotConfidence):
+        self.__writeShotRow(self.rankedSheets[confidence.value], row)
+        self.__writeShotRow(self.allSheet, row)
+    
     def writeShotData(self, data : shot.data):
-        self.__writeShotData(self.rankedSheets[data.shot.confidence.value], data)
-        self.__writeShotData(self.allSheet, data)
+        self.writeShotRow(xlsx.getShotRow(data, self.mode), data.shot.confidence)
         
     def finalize(self):
         self.__writeStatistics(self.allSheet)
@@ -382,6 +454,32 @@ class xlsx:
         self.wb.close()
         
         
+class csvSummary:
+    '''
+    CSV with the same row layout as the xlsx summary.
+    '''
+    __EXTENSION : str = 'csv'
+    __OPEN_MODE : str = 'w'
+    
+    def __init__(self, mode : xlsx.Mode = xlsx.Mode.Normal, fileName : str = DEFAULT_FILE_NAME):
+        self.mode : xlsx.Mode = mode
+        self.filePath : str = '{0}.{1}'.format(fileName, self.__EXTENSION)
+        self.file : FileIO = open(self.filePath, self.__OPEN_MODE, newline = '')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(xlsx.getHeaderLabels(self.mode))
+            
+    def writeShotRow(self, row : typing.List[typing.Any]):
+        self.writer.writerow(['' if value is None else value for value in row])
+        
+    def writeShotData(self, data : shot.data) -> typing.List[typing.Any]:
+        row : typing.List[typing.Any] = xlsx.getShotRow(data, self.mode)
+        self.writeShotRow(row)
+        return row
+        
+    def finalize(self):
+        self.file.close()
+        
+        
 class log:
     __EXTENSION : str = 'csv'
     __OPEN_MODE : str = 'w'
@@ -431,10 +529,12 @@ class xlsxData:
         Accel = 1
         HiG = 2
         
-    def __init__(self, name: str, folderPath : str, type : DataType = DataType.Gyro):
+    def __init__(self, name: str, folderPath : str, type : DataType = DataType.Gyro, decimation : int = 1):
         self.name: str = str(name)
         self.folderPath : str = folderPath
         self.type : self.DataType = type
+        # Write every n-th sample only; 1 keeps full resolution.
+        self.decimation : int = max(int(decimation), 1)
         self.wb: xlsxwriter.Workbook = xlsxwriter.Workbook(os.path.join(self.folderPath, '{0}.{1}'.format(self.name, self.__EXTENSION)))
         self.ws: typing.List[xlsxwriter.Workbook.worksheet_class] = []
         
@@ -448,22 +548,23 @@ class xlsxData:
         
     def addData(self, s : shot.data):
         MAX_VALUE = 10000
-        data : typing.List[shot.vector] = s.gyro
-        shotIndex = s.shot.datum.index
-        if self.type is self.DataType.Accel:
-            data = s.accel
-        elif self.type is self.DataType.HiG:
-            data = s.hiG
+        if self.type is self.DataType.HiG:
+            data : shot.stream = s.hiG
             shotIndex = s.hiGShot.datum.index
-        ws = self.wb.add_worksheet(s.fileName)
+        else:
+            data : shot.stream = s.accel if self.type is self.DataType.Accel else s.gyro
+            shotIndex = s.shot.datum.index
+        ws = self.wb.add_worksheet(getSheetName(self.wb, s.fileName))
         self.__addHeader(ws)
-        for i, d in enumerate(data):
-            ws.write(self.Row.Data.value + i, self.Col.Index.value, i)
-            ws.write(self.Row.Data.value + i, self.Col.X.value, d.x)
-            ws.write(self.Row.Data.value + i, self.Col.Y.value, d.y)
-            ws.write(self.Row.Data.value + i, self.Col.Z.value, d.z)
-            ws.write(self.Row.Data.value + i, self.Col.Magnitude.value, d.magnitude)
-        i = len(data)
+        # Whole columns go out in one call each straight from the arrays.
+        rows : np.ndarray = np.arange(0, len(data), self.decimation)
+        values : np.ndarray = data.values[rows].astype(np.float64)
+        ws.write_column(self.Row.Data.value, self.Col.Index.value, rows.tolist())
+        ws.write_column(self.Row.Data.value, self.Col.X.value, values[:, 0].tolist())
+        ws.write_column(self.Row.Data.value, self.Col.Y.value, values[:, 1].tolist())
+        ws.write_column(self.Row.Data.value, self.Col.Z.value, values[:, 2].tolist())
+        ws.write_column(self.Row.Data.value, self.Col.Magnitude.value, data.magnitude[rows].tolist())
+        i = len(rows)
         ws.write(self.Row.Data.value + i, self.Col.Index.value, shotIndex)
         ws.write(self.Row.Data.value + i, self.Col.Shot.value, -MAX_VALUE)
         i += 1
@@ -550,27 +651,26 @@ class xlsxAllData:
     def addData(self, s : shot.data):
         FACTOR = 1.4
         OFFSET = 20
-        ws = self.wb.add_worksheet(s.fileName)
+        sheetName : str = getSheetName(self.wb, s.fileName)
+        ws = self.wb.add_worksheet(sheetName)
         self.__addHeader(ws)
-        Data: typing.List[typing.List[shot.vector]] = [s.gyro, s.accel, s.hiG]
+        Types: typing.List[shot.vector.Type] = [shot.vector.Type.Gyro, shot.vector.Type.Accel, shot.vector.Type.HiG]
         ShotIndices: typing.List[int] = [s.shot.datum.index, s.shot.datum.index, s.hiGShot.datum.index]
         col: int = 0
-        for j, data in enumerate(Data):
+        rows: typing.List[int] = []
+        for j, type in enumerate(Types):
             row: int = 0
             shotIndex = ShotIndices[j]
-            minIndex: int = shotIndex - OFFSET
-            maxIndex: int = shotIndex + OFFSET + 1
-            if minIndex < 0:
-                minIndex = 0
-            if maxIndex > len(data):
-                maxIndex = len(data)
+            # Only the window is converted to units, not the whole stream.
+            w: shot.window = s.getWindowAround(type, shotIndex, OFFSET)
+            unit: np.ndarray = w.unit
             maxVal: float = 0.1
             minVal: float = -0.1
-            for k, d in enumerate(data[minIndex:maxIndex]):
-                ws.write(self.Row.Data.value + row, col + self.Col.Index.value, k + minIndex)
-                x = d.xUnit
-                y = d.yUnit
-                z = d.zUnit
+            for k in range(len(w)):
+                ws.write(self.Row.Data.value + row, col + self.Col.Index.value, k + w.start)
+                x = float(unit[k, 0])
+                y = float(unit[k, 1])
+                z = float(unit[k, 2])
                 ws.write(self.Row.Data.value + row, col + self.Col.X.value, x)
                 ws.write(self.Row.Data.value + row, col + self.Col.Y.value, y)
                 ws.write(self.Row.Data.value + row, col + self.Col.Z.value, z)
@@ -582,11 +682,144 @@ class xlsxAllData:
             row += 1
             ws.write(self.Row.Data.value + row, col + self.Col.Index.value, shotIndex)
             ws.write(self.Row.Data.value + row, col + self.Col.Shot.value, maxVal * FACTOR)
-            self.__addChart(ws, row, col, s.fileName, self.__TYPES[j], self.Row.Data.value, self.Col.Index.value + col)
+            self.__addChart(ws, row, col, sheetName, self.__TYPES[j], self.Row.Data.value, self.Col.Index.value + col)
+            rows.append(row)
             col += len(self.Col)
-        self.__addChart(ws, len(s.gyro), 0, s.fileName, 'Gyro-Y', self.Row.Data.value + 43, self.Col.Index.value + col - len(self.Col), False, True, False)
+        # Gyro-Y only spans the gyro rows that were written.
+        self.__addChart(ws, rows[self.Field.Gyro.value], 0, sheetName, 'Gyro-Y', self.Row.Data.value + 43, self.Col.Index.value + col - len(self.Col), False, True, False)
             
         self.ws.append(ws)
         
     def finalize(self):
-        self.wb.close()
\ No newline at end of file
+        self.wb.close()
+        
+        
+class arrowData:
+    '''
+    Columnar export of the raw streams and per-capture shot results, one
+    session directory per run:
+
+        <folder>/session=<session>/streams/<key>.<ext>   gyro, accel and hiG samples
+        <folder>/session=<session>/shots.<ext>           one row per capture
+
+    key is the capture's position in the session followed by its name, e.g.
+    000003-c0, so captures of the same name never share a stream file; the
+    stream column of shots holds it.
+
+    Each capture's streams are written and released before the next one, and
+    shot rows are flushed in small batches, so memory stays flat. Arrow IPC
+    files can be opened with pyarrow.memory_map. Requires pyarrow.
+    '''
+    class Format(enum.Enum):
+        Arrow = 'arrow'
+        Parquet = 'parquet'
+        
+    __STREAMS_FOLDER : str = 'streams'
+    __SHOTS_NAME : str = 'shots'
+    __FLUSH_ROWS : int = 1024
+    __PEAKS : typing.List[str] = [ 'maxGyro', 'maxAccel', 'maxHiG', 'maxAccelX', 'maxAccelY', 'maxAccelZ' ]
+    __SHOTS : typing.List[str] = [ 'shot', 'altShot', 'hiGShot' ]
+    
+    def __init__(self, folderPath : str, session : str = '', format : Format = Format.Arrow):
+        if pyarrow is None:
+            raise ImportError('arrowData requires pyarrow')
+        self.session : str = session or time.strftime('%Y%m%d-%H%M%S')
+        self.format : self.Format = format
+        self.folderPath : str = os.path.join(folderPath, 'session={0}'.format(self.session))
+        os.makedirs(os.path.join(self.folderPath, self.__STREAMS_FOLDER), exist_ok = True)
+        self.schema : pyarrow.Schema = self.__getShotSchema()
+        self.rows : typing.List[typing.Dict[str, typing.Any]] = []
+        self.count : int = 0
+        self.writer = self.__openWriter(os.path.join(self.folderPath, self.__SHOTS_NAME), self.schema)
+        
+    def __openWriter(self, fileName : str, schema : 'pyarrow.Schema'):
+        filePath : str = '{0}.{1}'.format(fileName, self.format.value)
+        if self.format is self.Format.Parquet:
+            return pyarrow.parquet.ParquetWriter(filePath, schema)
+        return pyarrow.ipc.new_file(filePath, schema)
+    
+    def __writeTable(self, writer, table : 'pyarrow.Table'):
+        if self.format is self.Format.Parquet:
+            writer.write_table(table)
+        else:
+            writer.write(table)
+            
+    def __getShotSchema(self) -> 'pyarrow.Schema':
+        fields : typing.List[pyarrow.Field] = [
+            pyarrow.field('name', pyarrow.string()),
+            pyarrow.field('file', pyarrow.string()),
+            pyarrow.field('stream', pyarrow.string()),
+            pyarrow.field('gyroSamples', pyarrow.int64()),
+            pyarrow.field('accelSamples', pyarrow.int64()),
+            pyarrow.field('hiGSamples', pyarrow.int64()),
+            pyarrow.field('handedness', pyarrow.string()),
+            pyarrow.field('calibrationX', pyarrow.float64()),
+            pyarrow.field('calibrationY', pyarrow.float64()),
+            pyarrow.field('calibrationZ', pyarrow.float64()),
+        ]
+        for prefix in self.__PEAKS + self.__SHOTS:
+            fields.append(pyarrow.field(prefix + 'Index', pyarrow.int64()))
+            for suffix in ('Magnitude', 'X', 'Y', 'Z'):
+                fields.append(pyarrow.field(prefix + suffix, pyarrow.float64()))
+            if prefix in self.__SHOTS:
+                fields.append(pyarrow.field(prefix + 'Confidence', pyarrow.int8()))
+        return pyarrow.schema(fields)
+    
+    def __getShotRow(self, s : shot.data, key : str) -> typing.Dict[str, typing.Any]:
+        row : typing.Dict[str, typing.Any] = {
+            'name': s.name,
+            'file': s.fileName,
+            'stream': key,
+            'gyroSamples': s.getLength(shot.vector.Type.Gyro),
+            'accelSamples': s.getLength(shot.vector.Type.Accel),
+            'hiGSamples': s.getLength(shot.vector.Type.HiG),
+            'handedness': s.handedness.name,
+            'calibrationX': s.calibration.x,
+            'calibrationY': s.calibration.y,
+            'calibrationZ': s.calibration.z,
+        }
+        for prefix in self.__PEAKS + self.__SHOTS:
+            datum = getattr(s, prefix)
+            if prefix in self.__SHOTS:
+                row[prefix + 'Confidence'] = datum.confidence.value
+                datum = datum.datum
+            row[prefix + 'Index'] = datum.index
+            row[prefix + 'Magnitude'] = datum.v.magnitude
+            row[prefix + 'X'] = datum.v.x
+            row[prefix + 'Y'] = datum.v.y
+            row[prefix + 'Z'] = datum.v.z
+        return row
+    
+    def __getStreamTable(self, s : shot.data) -> 'pyarrow.Table':
+        NAMES = [ 'gyro', 'accel', 'hiG' ]
+        streams : typing.List[shot.stream] = [s.gyro, s.accel, s.hiG]
+        # Keep the compact int16 samples unless some stream fell back to floats.
+        dtype = np.int16 if all(d.values.dtype == np.int16 for d in streams) else np.float64
+        values : np.ndarray = np.concatenate([d.values.astype(dtype, copy = False) for d in streams])
+        return pyarrow.table({
+            'stream': pyarrow.DictionaryArray.from_arrays(np.repeat(np.arange(len(NAMES), dtype = np.int8), [len(d) for d in streams]), NAMES),
+            'index': np.concatenate([np.arange(len(d), dtype = np.int32) for d in streams]),
+            'x': values[:, 0],
+            'y': values[:, 1],
+            'z': values[:, 2],
+        })
+    
+    def __flush(self):
+        if self.rows:
+            self.__writeTable(self.writer, pyarrow.Table.from_pylist(self.rows, self.schema))
+            self.rows = []
+        
+    def addData(self, s : shot.data):
+        key : str = '{0:06d}-{1}'.format(self.count, s.name)
+        self.count += 1
+        table : pyarrow.Table = self.__getStreamTable(s)
+        writer = self.__openWriter(os.path.join(self.folderPath, self.__STREAMS_FOLDER, key), table.schema)
+        self.__writeTable(writer, table)
+        writer.close()
+        self.rows.append(self.__getShotRow(s, key))
+        if len(self.rows) >= self.__FLUSH_ROWS:
+            self.__flush()
+        
+    def finalize(self):
+        self.__flush()
+        self.writer.close()
@@ -0,0 +1,232 @@
+# === IMPORTS ==================================================================
+
+import collections
+import concurrent.futures
+import queue
+import shotTrace
+import sys
+import threading
+import time
+import typing
+
+
+# === GLOBAL CONSTANTS =========================================================
+
+# Items each writer stage may hold before the producer blocks on it.
+DEFAULT_CAPACITY = 4
+DEFAULT_READERS = 2
+
+READ_BLOCK_SIZE = 1 << 20
+
+READ_STAGE = 'read'
+ANALYZE_STAGE = 'analyze'
+
+
+# === CLASSES ==================================================================
+
+class stageStats:
+    '''
+    Counters of one pipeline stage. busy is the time spent doing the stage's
+    own work; waited is time the pipeline spent waiting on the stage, i.e.
+    how long it was the bottleneck.
+    '''
+    def __init__(self, name : str):
+        self.name : str = name
+        self.items : int = 0
+        self.samples : int = 0
+        self.bytes : int = 0
+        self.busy : float = 0.0
+        self.waited : float = 0.0
+
+    def toDict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            'stage': self.name,
+            'items': self.items,
+            'samples': self.samples,
+            'bytes': self.bytes,
+            'busy': self.busy,
+            'waited': self.waited,
+            'samplesPerSecond': self.samples / self.busy if self.busy > 0 else None,
+            'bytesPerSecond': self.bytes / self.busy if self.busy > 0 else None,
+            }
+
+
+class stage:
+    '''
+    Writer stage running on its own thread behind a bounded queue. put()
+    blocks while the queue is full, which is what bounds the memory of the
+    whole pipeline. After a failure the thread keeps draining its queue so
+    the producer never blocks forever, and join() re-raises the error.
+    '''
+    __END : object = object()
+
+    def __init__(self, name : str, consume : typing.Callable[[typing.Any], None], finalize : typing.Optional[typing.Callable[[], None]] = None,
+                 capacity : int = DEFAULT_CAPACITY, tracer : shotTrace.tracer = shotTrace.DISABLED):
+        self.name : str = name
+        self.stats : stageStats = stageStats(name)
+        self.error : typing.Optional[BaseException] = None
+        self.__consume : typing.Callable[[typing.Any], None] = consume
+        self.__finalize : typing.Optional[typing.Callable[[], None]] = finalize
+        self.__tracer : shotTrace.tracer = tracer
+        self.__queue : queue.Queue = queue.Queue(max(capacity, 1))
+        self.__thread : threading.Thread = threading.Thread(target = self.__run, name = 'stage-' + name, daemon = True)
+        self.__thread.start()
+
+    def put(self, item : typing.Any, file : str = '', samples : int = 0):
+        start : float = time.perf_counter()
+        self.__queue.put((item, file, samples))
+        self.stats.waited += time.perf_counter() - start
+
+    def stop(self):
+        # Stopping every stage before joining any lets them finalize in
+        # parallel.
+        self.__queue.put(self.__END)
+
+    def join(self):
+        self.__thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __time(self, file : str, name : str, samples : int, work : typing.Callable[..., None], *args):
+        wall : float = time.perf_counter()
+        cpu : float = time.thread_time()
+        try:
+            work(*args)
+        except BaseException as e:
+            self.error = e
+        wall = time.perf_counter() - wall
+        self.stats.busy += wall
+        self.__tracer.add(file, name, wall, time.thread_time() - cpu, samples)
+
+    def __run(self):
+        while True:
+            entry = self.__queue.get()
+            if entry is self.__END:
+                break
+            if self.error is not None:
+                continue
+            item, file, samples = entry
+            self.__time(file, self.name, samples, self.__consume, item)
+            self.stats.items += 1
+            self.stats.samples += samples
+        if self.error is None and self.__finalize:
+            self.__time('', self.name + '.finalize', 0, self.__finalize)
+
+
+class pipeline:
+    '''
+    Staged ingestion: reader threads pull the next captures into the page
+    cache while earlier ones are analyzed, and every output gets a writer
+    stage of its own, so file I/O, analysis and workbook serialization
+    overlap. Writer threads share the GIL, so the gain is in overlapping
+    I/O, compression and the analysis pool rather than Python-level work.
+    '''
+    def __init__(self, capacity : int = DEFAULT_CAPACITY, tracer : shotTrace.tracer = shotTrace.DISABLED):
+        self.capacity : int = capacity
+        self.tracer : shotTrace.tracer = tracer
+        self.stages : typing.List[stage] = []
+        self.read : stageStats = stageStats(READ_STAGE)
+        self.analyze : stageStats = stageStats(ANALYZE_STAGE)
+        self.wall : float = 0.0
+        self.__readLock : threading.Lock = threading.Lock()
+
+    def addStage(self, name : str, consume : typing.Callable[[typing.Any], None], finalize : typing.Optional[typing.Callable[[], None]] = None) -> stage:
+        s : stage = stage(name, consume, finalize, self.capacity, self.tracer)
+        self.stages.append(s)
+        return s
+
+    def __readFile(self, filePath : str) -> int:
+        # Read through a small buffer: the point is to have the file in the
+        # page cache by the time a worker opens it, not to keep its bytes.
+        buffer : bytearray = bytearray(READ_BLOCK_SIZE)
+        size : int = 0
+        start : float = time.perf_counter()
+        try:
+            with open(filePath, 'rb', buffering = 0) as file:
+                while True:
+                    n : int = file.readinto(buffer)
+                    if not n:
+                        break
+                    size += n
+        except OSError:
+            # Left for the analysis to report.
+            pass
+        with self.__readLock:
+            self.read.busy += time.perf_counter() - start
+        return size
+
+    def readAhead(self, filePaths : typing.Iterable[str], readers : int = DEFAULT_READERS, depth : int = DEFAULT_CAPACITY) -> typing.Iterator[str]:
+        '''Yields filePaths in order once each has been read, keeping up to depth reads in flight.'''
+        if readers <= 0:
+            yield from filePaths
+            return
+        pending : typing.Deque[typing.Tuple[str, concurrent.futures.Future]] = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers = readers, thread_name_prefix = READ_STAGE) as executor:
+            for filePath in filePaths:
+                pending.append((filePath, executor.submit(self.__readFile, filePath)))
+                if len(pending) > depth:
+                    yield self.__collectRead(*pending.popleft())
+            while pending:
+                yield self.__collectRead(*pending.popleft())
+
+    def __collectRead(self, filePath : str, future : concurrent.futures.Future) -> str:
+        start : float = time.perf_counter()
+        self.read.bytes += future.result()
+        self.read.items += 1
+        self.read.waited += time.perf_counter() - start
+        return filePath
+
+    def run(self, items : typing.Iterable[typing.Any], getFile : typing.Callable[[typing.Any], str] = lambda item: '',
+            getSamples : typing.Callable[[typing.Any], int] = lambda item: 0, prepare : typing.Optional[typing.Callable[[typing.Any], None]] = None):
+        '''
+        Feeds every item to every stage in order, then finalizes the stages
+        in parallel. prepare runs on the feeding thread first, e.g. to load
+        whatever the stages would otherwise race to load. Raises the first
+        error of any stage once all of them have stopped.
+        '''
+        start : float = time.perf_counter()
+        iterator : typing.Iterator[typing.Any] = iter(items)
+        try:
+            while not any(s.error for s in self.stages):
+                waited : float = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                if prepare:
+                    prepare(item)
+                self.analyze.waited += time.perf_counter() - waited
+                file : str = getFile(item)
+                samples : int = getSamples(item)
+                self.analyze.items += 1
+                self.analyze.samples += samples
+                for s in self.stages:
+                    s.put(item, file, samples)
+        finally:
+            errors : typing.List[BaseException] = []
+            for s in self.stages:
+                s.stop()
+            for s in self.stages:
+                try:
+                    s.join()
+                except BaseException as e:
+                    errors.append(e)
+            self.wall = time.perf_counter() - start
+            # The analysis runs beside everything else, so its rate is
+            # measured over the whole run.
+            self.analyze.busy = self.wall
+        if errors:
+            raise errors[0]
+
+    def getSummary(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        return [s.toDict() for s in [self.read, self.analyze] + [s.stats for s in self.stages] if s.items]
+
+    def printSummary(self, file : typing.TextIO = sys.stdout):
+        file.write('{0:<20} {1:>6} {2:>12} {3:>10} {4:>10} {5:>10} {6:>14}\n'.format('stage', 'items', 'samples', 'MB', 'busy s', 'waited s', 'throughput'))
+        for s in self.getSummary():
+            throughput : str = '{0:.0f} samples/s'.format(s['samplesPerSecond'] or 0)
+            if s['bytes']:
+                throughput = '{0:.1f} MB/s'.format((s['bytesPerSecond'] or 0) / (1 << 20))
+            file.write('{0:<20} {1:>6} {2:>12} {3:>10.1f} {4:>10.3f} {5:>10.3f} {6:>14}\n'.format(
+                s['stage'], s['items'], s['samples'], s['bytes'] / (1 << 20), s['busy'], s['waited'], throughput))
+        file.write('pipeline wall {0:.3f} s\n'.format(self.wall))
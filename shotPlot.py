@@ -6,9 +6,17 @@ import numpy as np
 import operator
 import os
 import plotly.graph_objs as go
+import plotly.subplots
+import shot
 import string
 import typing
 
+# === GLOBAL CONSTANTS =========================================================
+
+DEFAULT_THRESHOLD = 2000
+AXIS_COLORS = ('#B01010', '#10B010', '#1010B0')
+MAGNITUDE_COLOR = '#7F7F7F'
+
 # === FUNCTIONS ================================================================
 
 '''
@@ -47,4 +55,88 @@ def vector_plot(tvects,is_vect=True,orig=[0,0,0]):
                            t = 4)
                   )
     fig = go.Figure(data=data,layout=layout)
-    fig.show()
\ No newline at end of file
+    fig.show()
+
+def lttb(y : np.ndarray, threshold : int = DEFAULT_THRESHOLD) -> np.ndarray:
+    '''
+    Indices of the samples kept when decimating y to threshold points with
+    Largest-Triangle-Three-Buckets. The first and last samples are always
+    kept and every bucket keeps the sample spanning the largest triangle with
+    its neighbours, so peaks survive decimation.
+    '''
+    n : int = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype = np.float64)
+    edges : np.ndarray = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices : np.ndarray = np.empty(threshold, dtype = np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a : int = 0
+    for i in range(threshold - 2):
+        start : int = int(edges[i])
+        end : int = int(edges[i + 1])
+        nextEnd : int = int(edges[i + 2]) if i + 2 < len(edges) else n
+        averageX : float = (end + nextEnd - 1) / 2
+        averageY : float = float(y[end:nextEnd].mean())
+        x : np.ndarray = np.arange(start, end)
+        area : np.ndarray = np.abs((a - averageX) * (y[start:end] - y[a]) - (a - x) * (averageY - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def addStreamTraces(fig : go.Figure, s : shot.stream, name : str, threshold : int = DEFAULT_THRESHOLD, row : typing.Optional[int] = None, start : int = 0):
+    # One WebGL trace per column, each decimated on its own so every axis
+    # keeps its own extremes.
+    columns : typing.List[typing.Tuple[str, np.ndarray, str]] = [
+        ('X', s.unit[:, 0], AXIS_COLORS[0]),
+        ('Y', s.unit[:, 1], AXIS_COLORS[1]),
+        ('Z', s.unit[:, 2], AXIS_COLORS[2]),
+        ('Magnitude', s.magnitudeUnit, MAGNITUDE_COLOR),
+        ]
+    for label, column, color in columns:
+        kept : np.ndarray = lttb(column, threshold)
+        trace : go.Scattergl = go.Scattergl(x = kept + start, y = column[kept], mode = 'lines', name = '{0} {1}'.format(name, label), line = dict(color = color, width = 1))
+        if row is None:
+            fig.add_trace(trace)
+        else:
+            fig.add_trace(trace, row = row, col = 1)
+
+def streamFigure(streams : typing.List[typing.Tuple[str, shot.stream, typing.Optional[int]]], threshold : int = DEFAULT_THRESHOLD) -> go.Figure:
+    '''
+    Stacked time series of whole streams, one row per (name, stream, shot
+    index) entry, with a dashed marker at the shot when there is one.
+    '''
+    fig : go.Figure = plotly.subplots.make_subplots(rows = len(streams), cols = 1, subplot_titles = [name for name, s, index in streams])
+    for i, (name, s, index) in enumerate(streams):
+        addStreamTraces(fig, s, name, threshold, i + 1)
+        if index is not None:
+            fig.add_vline(x = index, line = dict(color = MAGNITUDE_COLOR, dash = 'dash'), row = i + 1, col = 1)
+    fig.update_layout(margin = dict(l = 4, r = 4, b = 4, t = 24), height = 320 * len(streams))
+    return fig
+
+def vectorFigure(vectors : typing.List[typing.Tuple[str, np.ndarray]], origin : typing.List[float] = [0, 0, 0]) -> go.Figure:
+    '''
+    3D plot of (n, 3) vector arrays from origin, one batched trace per array:
+    every vector is a line segment and segments are separated by NaN, which
+    Plotly writes as null and draws as a gap.
+    '''
+    data : typing.List[go.Scatter3d] = []
+    for name, v in vectors:
+        v = np.asarray(v, dtype = np.float64).reshape(-1, 3)
+        segments : np.ndarray = np.full((len(v), 3, 3), np.nan)
+        segments[:, 0] = origin
+        segments[:, 1] = v + np.asarray(origin, dtype = np.float64)
+        points : np.ndarray = segments.reshape(-1, 3)
+        data.append(go.Scatter3d(x = points[:, 0], y = points[:, 1], z = points[:, 2], mode = 'lines+markers', name = name,
+                                 marker = dict(size = 2), line = dict(width = 5)))
+    layout = go.Layout(margin = dict(l = 4, r = 4, b = 4, t = 4))
+    return go.Figure(data = data, layout = layout)
+
+def show(fig : go.Figure, filePath : typing.Optional[str] = None):
+    # Batch runs write standalone HTML next to one shared copy of plotly.js
+    # instead of opening a browser.
+    if filePath is None:
+        fig.show()
+    else:
+        fig.write_html(filePath, include_plotlyjs = 'directory', auto_open = False)
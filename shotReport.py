@@ -0,0 +1,265 @@
+# === IMPORTS ==================================================================
+
+import base64
+import html
+import json
+import numpy as np
+import shot
+import shotOutput
+import shotPlot
+import typing
+
+
+# === GLOBAL CONSTANTS =========================================================
+
+DEFAULT_FILE_NAME = 'shotReport'
+DEFAULT_POINTS = 128
+MAX_RADIUS = 32767 # window offsets are sent as uint16
+
+STREAMS = (
+    ('accel', shot.vector.Type.Accel),
+    ('gyro', shot.vector.Type.Gyro),
+    ('hiG', shot.vector.Type.HiG),
+)
+STATISTICS = ('MIN', 'MAX', 'AVE', '|MIN|', '|MAX|', '|AVE|')
+ALL_GROUP = 'ALL'
+
+TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{{TITLE}}</title>
+<style>
+body { font: 13px sans-serif; margin: 16px; color: #202020; }
+h1 { font-size: 18px; }
+h2 { font-size: 15px; margin-top: 24px; }
+.bars { display: grid; grid-template-columns: 90px 1fr 50px; gap: 2px 8px; max-width: 640px; }
+.bar { background: #1010B0; height: 14px; }
+.scroll { overflow-x: auto; }
+table { border-collapse: collapse; }
+td, th { border: 1px solid #D0D0D0; padding: 2px 6px; text-align: right; white-space: nowrap; }
+#cards { display: grid; grid-template-columns: repeat(auto-fill, minmax(360px, 1fr)); gap: 12px; }
+.card { border: 1px solid #D0D0D0; padding: 6px; }
+.card canvas { width: 100%; height: 90px; display: block; }
+.label { font-size: 11px; color: #606060; }
+</style>
+</head>
+<body>
+<h1>{{TITLE}}</h1>
+<div id="summary"></div>
+<h2>Confidence</h2>
+<div id="distributions"></div>
+<h2>Statistics <select id="group"></select></h2>
+<div class="scroll"><table id="statistics"></table></div>
+<h2>Shots <select id="filter"></select> <input id="search" placeholder="name"></h2>
+<div id="cards"></div>
+<script type="application/json" id="data">{{DATA}}</script>
+<script>
+const DATA = JSON.parse(document.getElementById('data').textContent);
+const COLORS = ['#B01010', '#10B010', '#1010B0', '#7F7F7F'];
+function decode(text, type) {
+  const bytes = Uint8Array.from(atob(text), c => c.charCodeAt(0));
+  return new type(bytes.buffer);
+}
+function format(v) { return v === null ? '' : (Math.abs(v) >= 1000 ? v.toFixed(0) : v.toPrecision(4)); }
+document.getElementById('summary').textContent = DATA.entries.length + ' captures';
+const distributions = document.getElementById('distributions');
+for (const [name, counts] of Object.entries(DATA.distributions)) {
+  const total = Math.max(1, ...Object.values(counts));
+  let rows = '<div class="bars"><b>' + name + '</b><span></span><span></span>';
+  for (const [confidence, count] of Object.entries(counts)) {
+    rows += '<span>' + confidence + '</span><div class="bar" style="width:' + (100 * count / total) + '%"></div><span>' + count + '</span>';
+  }
+  distributions.insertAdjacentHTML('beforeend', rows + '</div><br>');
+}
+const group = document.getElementById('group');
+for (const name of Object.keys(DATA.statistics)) { group.add(new Option(name, name)); }
+function renderStatistics() {
+  const table = DATA.statistics[group.value];
+  let rows = '<tr><th></th>' + table.labels.map(l => '<th>' + l + '</th>').join('') + '</tr>';
+  DATA.statisticNames.forEach((name, i) => {
+    rows += '<tr><th>' + name + '</th>' + table.values.map(v => '<td>' + format(v[i]) + '</td>').join('') + '</tr>';
+  });
+  document.getElementById('statistics').innerHTML = rows;
+}
+group.onchange = renderStatistics;
+renderStatistics();
+function draw(canvas, w) {
+  const scale = window.devicePixelRatio || 1;
+  canvas.width = canvas.clientWidth * scale;
+  canvas.height = canvas.clientHeight * scale;
+  const context = canvas.getContext('2d');
+  const columns = w.columns.map(c => ({i: decode(c.i, Uint16Array), v: decode(c.v, Float32Array)}));
+  let min = Infinity, max = -Infinity;
+  for (const c of columns) { for (const v of c.v) { min = Math.min(min, v); max = Math.max(max, v); } }
+  if (!(max > min)) { max = min + 1; }
+  const last = Math.max(1, w.length - 1);
+  const x = i => i / last * canvas.width;
+  const y = v => canvas.height - (v - min) / (max - min) * canvas.height;
+  columns.forEach((c, k) => {
+    context.strokeStyle = COLORS[k];
+    context.lineWidth = scale;
+    context.beginPath();
+    c.i.forEach((i, j) => j ? context.lineTo(x(i), y(c.v[j])) : context.moveTo(x(i), y(c.v[j])));
+    context.stroke();
+  });
+  context.setLineDash([4 * scale, 4 * scale]);
+  context.strokeStyle = COLORS[3];
+  context.beginPath();
+  context.moveTo(x(w.index - w.start), 0);
+  context.lineTo(x(w.index - w.start), canvas.height);
+  context.stroke();
+}
+const observer = new IntersectionObserver(items => {
+  for (const item of items) {
+    if (!item.isIntersecting) { continue; }
+    observer.unobserve(item.target);
+    const entry = DATA.entries[item.target.dataset.entry];
+    item.target.querySelectorAll('canvas').forEach(canvas => draw(canvas, entry.windows[canvas.dataset.stream]));
+  }
+});
+const filter = document.getElementById('filter');
+filter.add(new Option('all confidences', ''));
+for (const name of DATA.confidences) { filter.add(new Option(name, name)); }
+const search = document.getElementById('search');
+const cards = document.getElementById('cards');
+DATA.entries.forEach((entry, n) => {
+  const card = document.createElement('div');
+  card.className = 'card';
+  card.dataset.entry = n;
+  let body = '<b></b> <span class="label"></span>';
+  for (const name of Object.keys(entry.windows)) {
+    body += '<div class="label">' + name + ' [' + entry.windows[name].start + ', ' + (entry.windows[name].start + entry.windows[name].length) + ')</div><canvas data-stream="' + name + '"></canvas>';
+  }
+  card.innerHTML = body;
+  card.querySelector('b').textContent = entry.name;
+  card.querySelector('.label').textContent = entry.confidence + ' @ ' + entry.shotIndex + ', hiG ' + entry.hiGConfidence + ' @ ' + entry.hiGShotIndex + ', ' + entry.samples + ' samples';
+  cards.appendChild(card);
+  observer.observe(card);
+});
+function applyFilter() {
+  const text = search.value.toLowerCase();
+  for (const card of cards.children) {
+    const entry = DATA.entries[card.dataset.entry];
+    card.style.display = (!filter.value || entry.confidence === filter.value) && entry.name.toLowerCase().includes(text) ? '' : 'none';
+  }
+}
+filter.onchange = applyFilter;
+search.oninput = applyFilter;
+</script>
+</body>
+</html>
+'''
+
+
+# === FUNCTIONS ================================================================
+
+def encode(a : np.ndarray, dtype : str) -> str:
+    return base64.b64encode(np.ascontiguousarray(a, dtype = dtype).tobytes()).decode('ascii')
+
+def __encodeWindow(d : shot.data, type : shot.vector.Type, index : int, radius : int, points : int) -> typing.Dict[str, typing.Any]:
+    # Each column is decimated on its own and stored as little-endian uint16
+    # offsets into the window plus float32 values in units.
+    w : shot.window = d.getWindowAround(type, index, radius)
+    columns : typing.List[typing.Dict[str, str]] = []
+    for column in (w.unit[:, 0], w.unit[:, 1], w.unit[:, 2], w.magnitudeUnit):
+        kept : np.ndarray = shotPlot.lttb(column, points)
+        columns.append({'i': encode(kept, '<u2'), 'v': encode(column[kept], '<f4')})
+    return {'start': w.start, 'length': len(w), 'index': index, 'columns': columns}
+
+def prepare(d : shot.data, mode : shotOutput.xlsx.Mode = shotOutput.xlsx.Mode.Abbreviated, radius : int = shot.WINDOW_RADIUS, points : int = DEFAULT_POINTS) -> typing.Dict[str, typing.Any]:
+    '''
+    Everything the dashboard shows for one capture, as a small JSON-ready
+    dict. Windows are taken around the shot for accel and gyro and around the
+    hiG shot for hiG, like the all-data workbook.
+    '''
+    indices : typing.Dict[shot.vector.Type, int] = {
+        shot.vector.Type.Accel: d.shot.datum.index,
+        shot.vector.Type.Gyro: d.shot.datum.index,
+        shot.vector.Type.HiG: d.hiGShot.datum.index,
+    }
+    return {
+        'name': d.name,
+        'file': d.fileName,
+        'samples': d.getLength(shot.vector.Type.Accel),
+        'confidence': d.shot.confidence.name,
+        'altConfidence': d.altShot.confidence.name,
+        'hiGConfidence': d.hiGShot.confidence.name,
+        'shotIndex': d.shot.datum.index,
+        'hiGShotIndex': d.hiGShot.datum.index,
+        'row': shotOutput.xlsx.getShotRow(d, mode),
+        'windows': {name: __encodeWindow(d, type, indices[type], radius, points) for name, type in STREAMS},
+    }
+
+
+# === CLASSES ==================================================================
+
+class dashboard:
+    '''
+    Single static HTML page for a whole run: confidence distributions, the
+    MIN/MAX/AVE statistics of the summary workbook and a canvas plot of the
+    windows of every capture. Entries come from prepare(), which is where
+    the per-file work happens, so it can run in worker processes.
+    '''
+    __EXTENSION : str = 'html'
+
+    def __init__(self, mode : shotOutput.xlsx.Mode = shotOutput.xlsx.Mode.Abbreviated, fileName : str = DEFAULT_FILE_NAME, title : str = 'Shot report'):
+        self.mode : shotOutput.xlsx.Mode = mode
+        self.filePath : str = '{0}.{1}'.format(fileName, self.__EXTENSION)
+        self.title : str = title
+        self.entries : typing.List[typing.Dict[str, typing.Any]] = []
+
+    def addEntry(self, entry : typing.Dict[str, typing.Any]):
+        self.entries.append(entry)
+
+    def addData(self, d : shot.data):
+        self.addEntry(prepare(d, self.mode))
+
+    def getDistributions(self) -> typing.Dict[str, typing.Dict[str, int]]:
+        distributions : typing.Dict[str, typing.Dict[str, int]] = {}
+        for name, key in (('shot', 'confidence'), ('altShot', 'altConfidence'), ('hiGShot', 'hiGConfidence')):
+            counts : typing.Dict[str, int] = {c.name: 0 for c in shot.ShotConfidence}
+            for entry in self.entries:
+                counts[entry[key]] += 1
+            distributions[name] = counts
+        return distributions
+
+    def getStatistics(self, entries : typing.List[typing.Dict[str, typing.Any]]) -> typing.Dict[str, typing.Any]:
+        # Same cells as the workbook's MIN/MAX/AVE rows: every labelled column
+        # over the summary rows, with empty cells left out.
+        labels : typing.List[str] = shotOutput.xlsx.getHeaderLabels(self.mode)
+        columns : typing.List[int] = [i for i, label in enumerate(labels) if label]
+        values : np.ndarray = np.full((len(entries), len(columns)), np.nan)
+        for i, entry in enumerate(entries):
+            for j, column in enumerate(columns):
+                value : typing.Any = entry['row'][column] if column < len(entry['row']) else None
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[i, j] = value
+        table : typing.List[typing.List[typing.Optional[float]]] = []
+        for j in range(len(columns)):
+            v : np.ndarray = values[:, j][~np.isnan(values[:, j])]
+            if len(v) == 0:
+                table.append([None] * len(STATISTICS))
+                continue
+            a : np.ndarray = np.abs(v)
+            table.append([float(v.min()), float(v.max()), float(v.mean()), float(a.min()), float(a.max()), float(a.mean())])
+        return {'labels': [labels[i] for i in columns], 'values': table}
+
+    def finalize(self):
+        statistics : typing.Dict[str, typing.Any] = {ALL_GROUP: self.getStatistics(self.entries)}
+        for c in shot.ShotConfidence:
+            entries : typing.List[typing.Dict[str, typing.Any]] = [e for e in self.entries if e['confidence'] == c.name]
+            if entries:
+                statistics[c.name] = self.getStatistics(entries)
+        data : typing.Dict[str, typing.Any] = {
+            'entries': self.entries,
+            'distributions': self.getDistributions(),
+            'statistics': statistics,
+            'statisticNames': STATISTICS,
+            'confidences': [c.name for c in shot.ShotConfidence],
+        }
+        # '</' would end the embedding script element early.
+        text : str = json.dumps(data, separators = (',', ':')).replace('</', '<\\/')
+        page : str = TEMPLATE.replace('{{TITLE}}', html.escape(self.title)).replace('{{DATA}}', text)
+        with open(self.filePath, 'w', encoding = 'utf-8') as file:
+            file.write(page)
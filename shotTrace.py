@@ -0,0 +1,148 @@
+# === IMPORTS ==================================================================
+
+import csv
+import json
+import sys
+import time
+import tracemalloc
+import typing
+
+
+# === CLASSES ==================================================================
+
+class record:
+    FIELDS = ('file', 'stage', 'wall', 'cpu', 'samples', 'peakBytes')
+
+    def __init__(self, file : str, stage : str, samples : int = 0):
+        self.file : str = file
+        self.stage : str = stage
+        self.wall : float = 0.0
+        self.cpu : float = 0.0
+        self.samples : int = samples
+        self.peakBytes : typing.Optional[int] = None
+
+    def toDict(self) -> typing.Dict[str, typing.Any]:
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+
+class stage:
+    '''
+    Context manager timing one stage of one file. Entering it returns the
+    record, so a stage can fill in its sample count once it knows it.
+    '''
+    def __init__(self, owner : 'tracer', r : record):
+        self.__owner : tracer = owner
+        self.__record : record = r
+        self.__started : bool = False
+        self.__base : int = 0
+        self.__wall : float = 0.0
+        self.__cpu : float = 0.0
+
+    def __enter__(self) -> record:
+        if self.__owner.memory:
+            self.__started = not tracemalloc.is_tracing()
+            if self.__started:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.__base = tracemalloc.get_traced_memory()[0]
+        self.__wall = time.perf_counter()
+        self.__cpu = time.process_time()
+        return self.__record
+
+    def __exit__(self, *exception) -> bool:
+        self.__record.wall = time.perf_counter() - self.__wall
+        self.__record.cpu = time.process_time() - self.__cpu
+        if self.__owner.memory:
+            self.__record.peakBytes = tracemalloc.get_traced_memory()[1] - self.__base
+            if self.__started:
+                tracemalloc.stop()
+        self.__owner.records.append(self.__record)
+        return False
+
+
+class nullStage:
+    '''Stage of a disabled tracer: enters and exits without doing anything.'''
+    def __init__(self):
+        self.__record : record = record('', '')
+
+    def __enter__(self) -> record:
+        return self.__record
+
+    def __exit__(self, *exception) -> bool:
+        return False
+
+
+class tracer:
+    '''
+    Collects per-file, per-stage wall time, CPU time, sample counts and,
+    with memory set, allocation peaks traced with tracemalloc. A disabled
+    tracer hands out one shared no-op stage, so instrumented code costs a
+    method call when tracing is off.
+    '''
+    __NULL_STAGE : nullStage = nullStage()
+
+    def __init__(self, enabled : bool = True, memory : bool = False):
+        self.enabled : bool = enabled
+        self.memory : bool = memory
+        self.records : typing.List[record] = []
+
+    def stage(self, file : str, name : str, samples : int = 0) -> typing.Union[stage, nullStage]:
+        if not self.enabled:
+            return self.__NULL_STAGE
+        return stage(self, record(file, name, samples))
+
+    def fork(self) -> 'tracer':
+        # Empty tracer with the same settings, e.g. for a worker process whose
+        # records are sent back and added with extend().
+        return tracer(self.enabled, self.memory)
+
+    def extend(self, records : typing.Iterable[record]):
+        self.records.extend(records)
+
+    def add(self, file : str, name : str, wall : float, cpu : float, samples : int = 0):
+        # Record timed by the caller, e.g. a pipeline thread, where the
+        # process-wide CPU clock and tracemalloc peaks would mix threads.
+        if not self.enabled:
+            return
+        r : record = record(file, name, samples)
+        r.wall = wall
+        r.cpu = cpu
+        self.records.append(r)
+
+    def getSummary(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        stages : typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        for r in self.records:
+            s : typing.Dict[str, typing.Any] = stages.setdefault(r.stage, {'stage': r.stage, 'files': 0, 'wall': 0.0, 'cpu': 0.0, 'samples': 0, 'peakBytes': None})
+            s['files'] += 1
+            s['wall'] += r.wall
+            s['cpu'] += r.cpu
+            s['samples'] += r.samples
+            if r.peakBytes is not None:
+                s['peakBytes'] = max(s['peakBytes'] or 0, r.peakBytes)
+        for s in stages.values():
+            s['samplesPerSecond'] = s['samples'] / s['wall'] if s['wall'] > 0 else None
+        return list(stages.values())
+
+    def printSummary(self, file : typing.TextIO = sys.stdout):
+        file.write('{0:<20} {1:>6} {2:>10} {3:>10} {4:>12} {5:>14} {6:>10}\n'.format('stage', 'files', 'wall s', 'cpu s', 'samples', 'samples/s', 'peak MB'))
+        for s in self.getSummary():
+            file.write('{0:<20} {1:>6} {2:>10.3f} {3:>10.3f} {4:>12} {5:>14.0f} {6:>10}\n'.format(
+                s['stage'], s['files'], s['wall'], s['cpu'], s['samples'], s['samplesPerSecond'] or 0,
+                '-' if s['peakBytes'] is None else '{0:.1f}'.format(s['peakBytes'] / (1 << 20))))
+
+    def write(self, filePath : str):
+        # CSV holds one row per record; anything else is written as JSON with
+        # the summary alongside the records.
+        with open(filePath, 'w', newline = '') as file:
+            if filePath.lower().endswith('.csv'):
+                writer : csv.DictWriter = csv.DictWriter(file, record.FIELDS)
+                writer.writeheader()
+                for r in self.records:
+                    writer.writerow(r.toDict())
+            else:
+                json.dump({'summary': self.getSummary(), 'records': [r.toDict() for r in self.records]}, file, indent = 2)
+
+
+# === GLOBAL CONSTANTS =========================================================
+
+DISABLED = tracer(False)